@@ -1,6 +1,7 @@
 """pytest-in-docker: Run pytest tests inside Docker containers."""
 
 from pytest_in_docker._decorator import in_container
+from pytest_in_docker._image_cache import evict_cached_images
 from pytest_in_docker._types import (
     BuildSpec,
     ContainerFactory,
@@ -10,6 +11,7 @@ from pytest_in_docker._types import (
     ImageSpec,
     InvalidContainerSpecError,
     NoContainerSpecifiedError,
+    ResultUnpicklingError,
 )
 
 __all__ = [
@@ -21,5 +23,7 @@ __all__ = [
     "ImageSpec",
     "InvalidContainerSpecError",
     "NoContainerSpecifiedError",
+    "ResultUnpicklingError",
+    "evict_cached_images",
     "in_container",
 ]
@@ -1,79 +1,312 @@
-"""Docker container bootstrapping and file transfer operations."""
+"""Docker container bootstrapping and file transfer operations.
 
-import io
+rpyc, cloudpickle and docker are imported where they're first needed, so
+loading the plugin doesn't pay for them in sessions without container tests.
+"""
+
+import atexit
+import functools
+import importlib
+import json
+import os
 import pathlib
+import pickle
+import socket
 import sys
-import tarfile
+import threading
 import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager, suppress
+from dataclasses import dataclass
 from types import FunctionType
 from typing import TYPE_CHECKING, Any
 
-import cloudpickle
-import rpyc
-
-from pytest_in_docker._types import ContainerPrepareError
+from pytest_in_docker._types import (
+    ContainerFactory,
+    ContainerPrepareError,
+    ResultUnpicklingError,
+)
 
 if TYPE_CHECKING:
-    from collections.abc import Callable, Iterable
+    from collections.abc import Callable, Iterator
 
     from testcontainers.core.container import DockerContainer
+    from testcontainers.core.docker_client import DockerClient
+    from testcontainers.core.image import DockerImage
 
 RPYC_PORT = 51337
-_VENV_DIR = "/opt/pytest-in-docker"
-_CONNECT_RETRIES = 10
-_CONNECT_DELAY = 0.5
+# Pure-Python packages uploaded from the host rather than installed.
+VENDORED_PACKAGES = ("cloudpickle", "rpyc", "plumbum")
+_REQUIREMENTS = pathlib.Path(__file__).with_name("_requirements.txt")
+# Pinned, fully resolved requirements.
+CONTAINER_DEPS = tuple(
+    line
+    for line in _REQUIREMENTS.read_text().splitlines()
+    if line and not line.startswith("#")
+)
+# The requirements are pre-resolved, so pip needs no resolver pass, no
+# source builds and no version check.
+PIP_INSTALL_FLAGS = (
+    "--no-cache-dir --no-deps --only-binary=:all: --disable-pip-version-check -q"
+)
+UV_INSTALL_FLAGS = "--no-cache --no-deps --only-binary :all: -q"
+VERBOSE_ENV_VAR = "PYTEST_IN_DOCKER_VERBOSE"
+RPYC_SERVER_PATH = pathlib.Path("/tmp/rpyc_server.py")  # noqa: S108
+RPYC_SERVER_LOG = RPYC_SERVER_PATH.with_suffix(".log")
+# Where a host directory is mounted for the rpyc server's Unix socket.
+RPYC_SOCKET_DIR = pathlib.Path("/run/pytest-in-docker")
+RPYC_SOCKET_NAME = "rpyc.sock"
+VENV_DIR = "/opt/pytest-in-docker"
+_VENV_PYTHON = pathlib.Path(f"{VENV_DIR}/bin/python")
+# Written once the deps are installed in the venv. The venv's interpreter
+# alone doesn't say so: a failed install leaves it behind too.
+INSTALLED_MARKER = f"{VENV_DIR}/.installed"
+_CONNECT_TIMEOUT = 10.0
+_PROBE_TIMEOUT = 0.05
+_BACKOFF_INITIAL = 0.005
+_BACKOFF_MAX = 0.1
+# Checked with a stat before falling back to a PATH lookup.
+_PYTHON_CANDIDATES = ("/usr/local/bin/python3", "/usr/bin/python3", "/usr/bin/python")
+_LOCAL_PYTHON_VERSION = f"{sys.version_info.major}.{sys.version_info.minor}"
+_IDENTITY_ENCODING = {"Accept-Encoding": "identity"}
+# docker-py keeps at most 10 idle connections per pool; concurrent execs on
+# a shared client beyond that open and drop a socket each.
+_DOCKER_POOL_SIZE = 32
+_TAR_BLOCK = 512
+_TAR_RECORD = 20 * _TAR_BLOCK
+# Size of the ustar name field; a name may fill it without a trailing NUL.
+_TAR_NAME_MAX = 100
+
+# Exit codes of the bootstrap script.
+_EXIT_NO_PYTHON = 40
+_EXIT_VERSION_FAILED = 41
+_EXIT_VERSION_MISMATCH = 42
+_EXIT_INSTALL_FAILED = 43
+_EXIT_MESSAGES: dict[int | None, str] = {
+    _EXIT_NO_PYTHON: "None of [python3, python] found in the container",
+    _EXIT_VERSION_FAILED: "Failed to determine Python version in the container",
+    _EXIT_INSTALL_FAILED: "Failed to install container deps.",
+}
+
+# docker API clients already passed through _docker_api.
+_TUNED_APIS: weakref.WeakSet[Any] = weakref.WeakSet()
+
+# Live connections to bootstrapped containers, keyed by Docker container id.
+_CONN_POOL: dict[str, Any] = {}
+_CONN_POOL_LOCK = threading.Lock()
+# testcontainers creates its Reaper on the first container start without a
+# lock, and concurrent first starts each try to create it under the same name.
+_REAPER_LOCK = threading.Lock()
+
+# Keyed on the function object rather than its code object: functions that
+# share code (e.g. closures from one factory) may capture different values.
+_PAYLOAD_CACHE: weakref.WeakKeyDictionary[Callable[..., Any], bytes] = (
+    weakref.WeakKeyDictionary()
+)
+# Payloads above this size are streamed to the container in chunks of this
+# size rather than sent as a single rpyc request.
+_PAYLOAD_CHUNK = 1 << 20
+# cloudpickle's by-value registry is global; pickling holds it throughout.
+_PICKLE_LOCK = threading.Lock()
+# Attribute on rpyc connections holding their unpickled remote functions.
+_REMOTE_FUNCS_ATTR = "_pytest_in_docker_remote_funcs"
+
+# The first argument is the port to listen on, or the path of a Unix socket
+# to bind instead. The socket is made connectable by everyone, since the
+# host user reaching it through a bind mount isn't the container's user.
+# Netref type info is sent without docstrings: the host never reads them,
+# and they are most of the payload of every type the host touches.
+RPYC_SERVER_SCRIPT = """
+import os
+import sys
 
-_RPYC_SERVER_SCRIPT = f"""
+import rpyc.core.protocol
 from rpyc.utils.server import ThreadedServer
 from rpyc import SlaveService as ChildService
 
-server = ThreadedServer(ChildService, port={RPYC_PORT})
+_get_methods = rpyc.core.protocol.get_methods
+rpyc.core.protocol.get_methods = lambda local_attrs, obj: [
+    (name, None) for name, _ in _get_methods(local_attrs, obj)
+]
+
+listen = sys.argv[1]
+if listen.isdigit():
+    server = ThreadedServer(ChildService, port=int(listen))
+else:
+    server = ThreadedServer(ChildService, socket_path=listen)
+    os.chmod(listen, 0o777)
 server.start()
 """
 
 
-def _loopback[T](value: T) -> T:
-    """Identity function used to verify rpyc connectivity."""
-    return value
+def _log_verbose(message: str) -> None:
+    """Write *message* to stderr when ``PYTEST_IN_DOCKER_VERBOSE=1``."""
+    if os.environ.get(VERBOSE_ENV_VAR) == "1":
+        _ = sys.stderr.write(f"pytest-in-docker: {message}\n")
 
 
-def copy_file_to_container(
-    content: str, path: pathlib.Path, container: DockerContainer
-) -> None:
-    """Copy a string as a file into a running Docker container via tar archive."""
-    tar_stream = io.BytesIO()
-    with tarfile.open(fileobj=tar_stream, mode="w") as tar:
-        tarinfo = tarfile.TarInfo(name="transfer.txt")
-        tarinfo.size = len(content)
-        tar.addfile(tarinfo, io.BytesIO(content.encode("utf-8")))
-    _ = tar_stream.seek(0)
+def _tar_number(value: int, width: int) -> bytes:
+    """Encode *value* as a NUL-terminated octal tar header field."""
+    return b"%0*o\0" % (width - 1, value)
 
-    if container._container is None:  # noqa: SLF001
-        msg = "Container is not running."
-        raise RuntimeError(msg)
 
-    _ = container._container.put_archive(path="/tmp", data=tar_stream.read())  # noqa: S108, SLF001
-    if (res := container.exec(["mv", "/tmp/transfer.txt", str(path)])).exit_code != 0:  # noqa: S108
-        msg = f"Failed to move temporary file to destination: {res.output}"
-        raise ContainerPrepareError(msg)
+def _tar_header(name: str, size: int) -> bytes:
+    """Return the ustar header block for a regular file *name* of *size* bytes.
 
+    Every field other than the name and size is fixed (mode 0644, owner
+    root, mtime 0), so the header is assembled directly instead of going
+    through ``tarfile``. Names longer than the name field are rejected
+    rather than spilled into the other fields.
+    """
+    encoded = name.encode()
+    if len(encoded) > _TAR_NAME_MAX:
+        msg = f"Tar member name is longer than {_TAR_NAME_MAX} bytes: {name!r}"
+        raise ValueError(msg)
+    header = b"".join(
+        (
+            encoded.ljust(_TAR_NAME_MAX, b"\0"),
+            _tar_number(0o644, 8),
+            _tar_number(0, 8),  # uid
+            _tar_number(0, 8),  # gid
+            _tar_number(size, 12),
+            _tar_number(0, 12),  # mtime
+            b" " * 8,  # checksum, computed over spaces
+            b"0",  # regular file
+            b"\0" * 100,  # linkname
+            b"ustar\x0000",
+            b"\0" * 80,  # uname, gname, devmajor, devminor
+        )
+    ).ljust(_TAR_BLOCK, b"\0")
+    return header[:148] + b"%06o\0" % sum(header) + header[155:]
 
-def _find_binary(container: DockerContainer, name: str) -> pathlib.Path:
-    res = container.exec(["which", name])
-    if res.exit_code != 0:
-        msg = f"'{name}' not found in the container: {res.output}"
-        raise ContainerPrepareError(msg)
-    return pathlib.Path(res.output.decode("utf-8").strip())
 
+def _tar_archive(members: dict[str, bytes]) -> bytes:
+    """Return an uncompressed tar archive holding *members* by name.
 
-def _find_one_of(container: DockerContainer, names: Iterable[str]) -> pathlib.Path:
-    for name in names:
-        try:
-            return _find_binary(container, name)
-        except ContainerPrepareError:
-            continue
-    msg = f"None of [{', '.join(names)}] found in the container"
-    raise ContainerPrepareError(msg)
+    The output is byte-for-byte what ``tarfile`` writes for the same
+    members with default ``TarInfo`` fields. It's assembled with a single
+    join, so each member's data is copied once.
+    """
+    parts: list[bytes] = []
+    size = 0
+    for name, data in members.items():
+        padding = b"\0" * (-len(data) % _TAR_BLOCK)
+        parts += (_tar_header(name, len(data)), data, padding)
+        size += _TAR_BLOCK + len(data) + len(padding)
+    size += 2 * _TAR_BLOCK
+    parts.append(b"\0" * (2 * _TAR_BLOCK + -size % _TAR_RECORD))
+    return b"".join(parts)
+
+
+@functools.cache
+def shared_docker_client() -> DockerClient:
+    """Return the Docker client shared by the containers and images created here.
+
+    testcontainers otherwise gives every container and image its own
+    client, each with a new connection pool and an API version request.
+    """
+    from testcontainers.core.docker_client import DockerClient  # noqa: PLC0415
+
+    shared = DockerClient(max_pool_size=_DOCKER_POOL_SIZE)
+    shared.client.__class__ = _unclosable_client_type()
+    return shared
+
+
+@functools.cache
+def _unclosable_client_type() -> type:
+    """Return a docker client class whose ``close`` keeps the connections open.
+
+    testcontainers closes the client whenever a container is stopped or an
+    image removed, which on a shared client would drop the pool under every
+    other thread using it. The connections are closed once, by
+    :func:`close_shared_docker_client`.
+    """
+    import docker  # noqa: PLC0415
+
+    class UnclosableDockerClient(docker.DockerClient):
+        def close(self) -> None:
+            pass
+
+    return UnclosableDockerClient
+
+
+def _shared_client_kw() -> dict[str, Any]:
+    # Pinning the version keeps the throwaway client that testcontainers
+    # builds before it's replaced from querying the daemon.
+    return {"version": shared_docker_client().client.api.api_version}
+
+
+def _ensure_reaper() -> None:
+    """Start testcontainers' Reaper once, before containers start concurrently."""
+    from testcontainers.core.config import testcontainers_config  # noqa: PLC0415
+    from testcontainers.core.container import Reaper  # noqa: PLC0415
+
+    if testcontainers_config.ryuk_disabled:
+        return
+    with _REAPER_LOCK:
+        _ = Reaper.get_instance()
+
+
+def docker_container(image: str) -> DockerContainer:
+    """Return a ``DockerContainer`` for *image* on the shared Docker client."""
+    from testcontainers.core.container import DockerContainer  # noqa: PLC0415
+
+    _ensure_reaper()
+    container = DockerContainer(image, docker_client_kw=_shared_client_kw())
+    container._docker = shared_docker_client()  # noqa: SLF001
+    return container
+
+
+def docker_image(path: str, tag: str) -> DockerImage:
+    """Return a ``DockerImage`` building *path* as *tag* on the shared client."""
+    from testcontainers.core.image import DockerImage  # noqa: PLC0415
+
+    image = DockerImage(path=path, tag=tag, docker_client_kw=_shared_client_kw())
+    image._docker = shared_docker_client()  # noqa: SLF001
+    return image
+
+
+def close_shared_docker_client() -> None:
+    """Close the shared Docker client's connections, if it was created."""
+    if shared_docker_client.cache_info().currsize:
+        shared_docker_client().client.api.close()
+        shared_docker_client.cache_clear()
+
+
+def _docker_api(container: DockerContainer) -> Any:  # noqa: ANN401
+    """Return the docker API client of *container*, tuned on first use.
+
+    The client's requests session is switched to identity encoding, as
+    docker-py already does for ``get_archive``: nothing it sends or fetches
+    here gains from gzip. Its unix-socket adapter is given a larger
+    keep-alive pool so concurrent execs reuse connections.
+    """
+    api = container.get_docker_client().client.api
+    if api in _TUNED_APIS:
+        return api
+
+    from docker.transport import UnixHTTPAdapter  # noqa: PLC0415
+
+    api.headers.update(_IDENTITY_ENCODING)
+    adapter = getattr(api, "_custom_adapter", None)
+    if isinstance(adapter, UnixHTTPAdapter):
+        adapter.max_pool_size = _DOCKER_POOL_SIZE
+        # Pools are created lazily with the size current at the time; drop
+        # the one opened by the version check so it's recreated larger.
+        adapter.pools.clear()
+    _TUNED_APIS.add(api)
+    return api
+
+
+def _put_archive(container: DockerContainer, path: str, data: bytes) -> None:
+    """Upload a tar archive to *path* without HTTP compression negotiation."""
+    if container._container is None:  # noqa: SLF001
+        msg = "Container is not running."
+        raise RuntimeError(msg)
+
+    _ = _docker_api(container)
+    _ = container._container.put_archive(path=path, data=data)  # noqa: SLF001
 
 
 def _run_or_fail(
@@ -85,110 +318,450 @@ def _run_or_fail(
         raise ContainerPrepareError(msg)
 
 
-def _check_python_version(container: DockerContainer, python: pathlib.Path) -> None:
-    """Verify the container's Python major.minor matches the host."""
-    version_script = (
-        "import sys; print(f'{sys.version_info.major}.{sys.version_info.minor}')"
+def _serve_command(python: str, listen: str) -> str:
+    """Return a shell command starting the rpyc server in the background.
+
+    The server gets its own stdio, so the exec that starts it returns at
+    once instead of waiting for the server to let go of the exec's output
+    stream. Its output goes to ``RPYC_SERVER_LOG`` for debugging.
+    """
+    return (
+        f"nohup {python} {RPYC_SERVER_PATH} {listen} "
+        f"</dev/null >{RPYC_SERVER_LOG} 2>&1 &"
     )
-    res = container.exec([str(python), "-c", version_script])
-    if res.exit_code != 0:
-        msg = f"Failed to determine Python version in the container: {res.output}"
-        raise ContainerPrepareError(msg)
-    remote_ver = res.output.decode("utf-8").strip()
-    local_ver = f"{sys.version_info.major}.{sys.version_info.minor}"
-    if remote_ver != local_ver:
+
+
+@functools.cache
+def _bootstrap_script(*, start_server: bool) -> str:
+    """Return a shell script that prepares the container in a single exec.
+
+    The script discovers python (the venv when ``INSTALLED_MARKER`` says
+    its install completed, then well-known paths, then PATH), checks its
+    major.minor against the host, optionally starts the uploaded rpyc
+    server listening on the port or socket path given as the script's first
+    argument, and installs the deps unless that python can already import
+    pytest (with uv when the image has it, else with pip into a freshly
+    cleared venv when possible, else with --break-system-packages). The
+    server only needs the vendored packages, so it starts before the
+    install and comes up while it runs. Failures are reported through the
+    ``_EXIT_*`` codes; on success the last line of output is
+    ``{"python": "<path>", "installer": "uv" | "pip" | "none"}``.
+    """
+    deps = " ".join(CONTAINER_DEPS)
+    serve = ":"
+    if start_server:
+        serve = _serve_command('"$P"', '"$LISTEN"') + "\nS=$!"
+    return f"""
+LISTEN=$1
+S=
+installed=0
+if [ -f {INSTALLED_MARKER} ] && [ -x {_VENV_PYTHON} ]; then
+    P={_VENV_PYTHON}
+    installed=1
+else
+    for P in {" ".join(_PYTHON_CANDIDATES)} ""; do
+        [ -x "$P" ] && break
+    done
+    if [ -z "$P" ]; then
+        P=$(command -v python3 || command -v python) || exit {_EXIT_NO_PYTHON}
+    fi
+fi
+V=$("$P" -c 'import sys; print("%d.%d" % sys.version_info[:2])') \\
+    || exit {_EXIT_VERSION_FAILED}
+if [ "$V" != "{_LOCAL_PYTHON_VERSION}" ]; then
+    echo "$V"
+    exit {_EXIT_VERSION_MISMATCH}
+fi
+if [ "$installed" = 0 ] && "$P" -c 'import pytest' 2>/dev/null; then
+    installed=1
+fi
+installer=none
+system_pip=
+if [ "$installed" = 0 ]; then
+    installer=pip
+    if command -v uv >/dev/null 2>&1 \\
+            && uv venv -q --clear --python "$P" {VENV_DIR}; then
+        installer=uv
+        P={_VENV_PYTHON}
+    elif "$P" -m venv --clear {VENV_DIR}; then
+        P={_VENV_PYTHON}
+    else
+        system_pip=--break-system-packages
+    fi
+fi
+{serve}
+install_failed() {{
+    [ -n "$S" ] && kill "$S" 2>/dev/null
+    exit {_EXIT_INSTALL_FAILED}
+}}
+if [ "$installer" = uv ]; then
+    uv pip install --python "$P" {UV_INSTALL_FLAGS} {deps} || install_failed
+elif [ "$installer" = pip ]; then
+    "$P" -m pip install {PIP_INSTALL_FLAGS} $system_pip {deps} || install_failed
+fi
+if [ "$installer" != none ] && [ "$P" = {_VENV_PYTHON} ]; then
+    touch {INSTALLED_MARKER}
+fi
+printf '{{"python": "%s", "installer": "%s"}}\\n' "$P" "$installer"
+"""
+
+
+@functools.cache
+def _server_archive() -> bytes:
+    """Return a tar archive of the rpyc server script and its packages.
+
+    The host's copies of ``VENDORED_PACKAGES`` are pure Python, so they're
+    uploaded next to the server script instead of pip-installed: Python puts
+    the script's directory first on sys.path. Using the host's exact
+    versions also keeps pickles and the rpyc protocol compatible on both
+    sides.
+    """
+    members = {RPYC_SERVER_PATH.name: RPYC_SERVER_SCRIPT.encode()}
+    for name in VENDORED_PACKAGES:
+        package = pathlib.Path(importlib.import_module(name).__file__ or "").parent
+        for source in sorted(package.rglob("*")):
+            if source.is_file() and "__pycache__" not in source.parts:
+                arcname = source.relative_to(package.parent).as_posix()
+                members[arcname] = source.read_bytes()
+    return _tar_archive(members)
+
+
+def build_context(dockerfile: str) -> bytes:
+    """Return a Docker build context of *dockerfile* and ``server.tar``.
+
+    ``server.tar`` holds the rpyc server script and its vendored packages,
+    laid out for ``ADD server.tar`` into the server script's directory.
+    """
+    return _tar_archive(
+        {"Dockerfile": dockerfile.encode(), "server.tar": _server_archive()}
+    )
+
+
+def _run_bootstrap_script(
+    container: DockerContainer, *, start_server: bool, listen: str = str(RPYC_PORT)
+) -> pathlib.Path:
+    """Upload the server and run the bootstrap script, translating its exit code.
+
+    Everything the container needs arrives in one archive upload followed by
+    one exec.
+    """
+    _put_archive(container, str(RPYC_SERVER_PATH.parent), _server_archive())
+    script = _bootstrap_script(start_server=start_server)
+    res = container.exec(["sh", "-c", script, "sh", listen])
+    output = res.output.decode("utf-8").strip()
+    if res.exit_code == 0:
+        result = json.loads(output.splitlines()[-1])
+        _log_verbose(f"installed container deps with {result['installer']}")
+        return pathlib.Path(result["python"])
+    if res.exit_code == _EXIT_VERSION_MISMATCH:
         msg = (
-            f"Python version mismatch: host has {local_ver} but "
-            f"container has {remote_ver}. Matching major.minor "
+            f"Python version mismatch: host has {_LOCAL_PYTHON_VERSION} but "
+            f"container has {output}. Matching major.minor "
             f"versions are required for pickle compatibility."
         )
-        raise ContainerPrepareError(msg)
+    else:
+        reason = _EXIT_MESSAGES.get(res.exit_code, "Failed to prepare the container.")
+        msg = f"{reason}: Error: {output}"
+    raise ContainerPrepareError(msg)
 
 
-def _install_deps(container: DockerContainer, python: pathlib.Path) -> pathlib.Path:
-    """Install rpyc and pytest, returning the python path to use.
+def _probe(address: tuple[str, int] | str) -> None:
+    """Connect to *address* once and hang up, raising OSError on failure."""
+    if isinstance(address, tuple):
+        socket.create_connection(address, timeout=_PROBE_TIMEOUT).close()
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(_PROBE_TIMEOUT)
+        sock.connect(address)
 
-    Tries to create a venv first (respects PEP 668). Falls back to
-    --break-system-packages on minimal images where python3-venv or
-    ensurepip is stripped.
+
+def _wait_port_open(address: tuple[str, int] | str, deadline: float) -> None:
+    """Block until *address* accepts connections, polling with backoff.
+
+    *address* is a ``(host, port)`` pair or the path of a Unix socket.
     """
-    venv_ok = container.exec([str(python), "-m", "venv", _VENV_DIR]).exit_code == 0
-    if venv_ok:
-        python = pathlib.Path(f"{_VENV_DIR}/bin/python")
+    delay = _BACKOFF_INITIAL
+    while True:
+        try:
+            _probe(address)
+        except OSError as exc:
+            if time.monotonic() + delay > deadline:
+                msg = f"{address} did not open in time: {exc}"
+                raise ContainerPrepareError(msg) from exc
+        else:
+            return
+        time.sleep(delay)
+        delay = min(delay * 2, _BACKOFF_MAX)
+
+
+def _open_stream(address: tuple[str, int] | str) -> Any:  # noqa: ANN401
+    """Open the socket stream for an rpyc connection to *address*.
+
+    Nagle's algorithm is disabled from the start, so attribute lookups and
+    calls aren't held back waiting for delayed ACKs. The buffer sizes are
+    left to the kernel's autotuning, which fixed sizes would switch off.
+    Unix sockets have neither, and skip the TCP stack altogether.
+    """
+    from rpyc.core.stream import SocketStream  # noqa: PLC0415
+
+    if isinstance(address, str):
+        return SocketStream.unix_connect(address)
+    host, port = address
+    return SocketStream.connect(host, port, nodelay=True, keepalive=True)
+
+
+def _tune_channel(conn: Any) -> None:  # noqa: ANN401
+    """Tune the rpyc channel of *conn* for small, latency-bound requests.
 
-    install_cmd = [str(python), "-m", "pip", "install", "cloudpickle", "rpyc", "pytest"]
-    if not venv_ok:
-        install_cmd.insert(4, "--break-system-packages")
-    _run_or_fail(container, install_cmd, "Failed to install container deps.")
-    return python
+    Turns off rpyc's zlib compression of outgoing frames, which costs CPU
+    without saving anything on a local link.
+    """
+    conn._channel.compress = False  # noqa: SLF001
 
 
 def _connect_with_retries(
-    host: str, port: int, *, sync_request_timeout: int = 30
+    address: tuple[str, int] | str, *, sync_request_timeout: int = 30
 ) -> Any:  # noqa: ANN401
-    """Connect to the rpyc server, retrying until it's ready."""
-    last_err: Exception | None = None
-    for _ in range(_CONNECT_RETRIES):
+    """Connect to the rpyc server, retrying with backoff until it's ready.
+
+    Docker's port proxy may accept connections before the server inside the
+    container listens, so the rpyc handshake itself is retried as well.
+    """
+    import rpyc  # noqa: PLC0415
+    from rpyc.core.protocol import PingError  # noqa: PLC0415
+
+    deadline = time.monotonic() + _CONNECT_TIMEOUT
+    delay = _BACKOFF_INITIAL
+    while True:
+        _wait_port_open(address, deadline)
+        stream = conn = None
         try:
-            conn = rpyc.classic.connect(host, port)
+            stream = _open_stream(address)
+            conn = rpyc.classic.connect_stream(stream)
+            _tune_channel(conn)
             conn._config["sync_request_timeout"] = sync_request_timeout  # noqa: SLF001
-            lo = conn.teleport(_loopback)
-            if lo("hello") != "hello":
+            # A ping is answered by the protocol layer in one round trip,
+            # without teleporting anything.
+            conn.ping("hello", timeout=sync_request_timeout)
+        except (PingError, EOFError, ConnectionRefusedError, OSError) as exc:
+            # Close whatever this attempt opened, so retries don't leak sockets.
+            if conn is not None:
+                conn.close()
+            elif stream is not None:
+                stream.close()
+            if isinstance(exc, PingError):
                 msg = "Failed to communicate with rpyc server on the container."
-                raise ContainerPrepareError(msg)
-        except (EOFError, ConnectionRefusedError, OSError) as exc:
-            last_err = exc
-            time.sleep(_CONNECT_DELAY)
+                raise ContainerPrepareError(msg) from exc
+            if time.monotonic() + delay > deadline:
+                msg = (
+                    f"Could not connect to rpyc server within "
+                    f"{_CONNECT_TIMEOUT}s: {exc}"
+                )
+                raise ContainerPrepareError(msg) from exc
         else:
             return conn
+        time.sleep(delay)
+        delay = min(delay * 2, _BACKOFF_MAX)
 
-    msg = (
-        f"Could not connect to rpyc server after {_CONNECT_RETRIES} attempts: "
-        f"{last_err}"
-    )
-    raise ContainerPrepareError(msg)
 
+def prepare_container(container: DockerContainer) -> pathlib.Path:
+    """Install dependencies and the rpyc server script, returning the python path."""
+    return _run_bootstrap_script(container, start_server=False)
 
-def bootstrap_container(
-    container: DockerContainer, *, sync_request_timeout: int = 30
+
+def listen_arg(host_port: int | None, socket_dir: str | None) -> str:
+    """Return what the rpyc server listens on: a port or a socket path."""
+    if socket_dir is not None:
+        return str(RPYC_SOCKET_DIR / RPYC_SOCKET_NAME)
+    return str(RPYC_PORT if host_port is None else host_port)
+
+
+def _published_port(container: DockerContainer) -> int:
+    """Return the host port Docker published for ``RPYC_PORT``.
+
+    Reads the mapping from a single inspect of the started container, where
+    testcontainers' ``get_exposed_port`` makes one request to wait for it to
+    run and another to look the port up.
+    """
+    wrapped = container.get_wrapped_container()
+    wrapped.reload()
+    bindings = wrapped.ports.get(f"{RPYC_PORT}/tcp")
+    if not bindings:
+        msg = f"Port {RPYC_PORT} is not published (container is {wrapped.status})."
+        raise ContainerPrepareError(msg)
+    return int(bindings[0]["HostPort"])
+
+
+def _rpyc_address(
+    container: DockerContainer, host_port: int | None, socket_dir: str | None
+) -> tuple[str, int] | str:
+    """Return where the host reaches the rpyc server of *container*.
+
+    It is resolved once per connection; pooled and session connections keep
+    the container for its lifetime, so it is never looked up again.
+    """
+    if socket_dir is not None:
+        return str(pathlib.Path(socket_dir) / RPYC_SOCKET_NAME)
+    if host_port is not None:
+        return "127.0.0.1", host_port
+    host = container.get_container_host_ip()
+    if not container.get_docker_client().get_connection_mode().use_mapped_port:
+        return host, RPYC_PORT
+    return host, _published_port(container)
+
+
+def start_rpyc_server(
+    container: DockerContainer,
+    python: pathlib.Path | str,
+    *,
+    sync_request_timeout: int = 30,
+    host_port: int | None = None,
+    socket_dir: str | None = None,
 ) -> Any:  # noqa: ANN401
-    """Install dependencies, start rpyc server, and return a verified connection."""
-    python = _find_one_of(container, ["python3", "python"])
-    _check_python_version(container, python)
-    python = _install_deps(container, python)
-
-    copy_file_to_container(
-        _RPYC_SERVER_SCRIPT,
-        pathlib.Path("/tmp/rpyc_server.py"),  # noqa: S108
-        container,
-    )
+    """Start the rpyc server in a prepared container and return a verified connection.
+
+    *python* is interpolated into a shell command, so it may also be a shell
+    expression such as ``"$VAR"`` that expands to the interpreter path.
+
+    *host_port* is for containers sharing the host's network namespace: the
+    server binds it directly and is reached on loopback. *socket_dir* is a
+    host directory mounted at ``RPYC_SOCKET_DIR``: the server binds a Unix
+    socket in it and no port is used at all. Otherwise the server binds
+    ``RPYC_PORT`` and is reached through the published port.
+    """
     _run_or_fail(
         container,
-        ["sh", "-c", f"{python} /tmp/rpyc_server.py &"],
+        ["sh", "-c", _serve_command(str(python), listen_arg(host_port, socket_dir))],
         "Failed to start rpyc server on the container.",
     )
+    return connect_to_server(
+        container,
+        sync_request_timeout=sync_request_timeout,
+        host_port=host_port,
+        socket_dir=socket_dir,
+    )
+
+
+def connect_to_server(
+    container: DockerContainer,
+    *,
+    sync_request_timeout: int = 30,
+    host_port: int | None = None,
+    socket_dir: str | None = None,
+) -> Any:  # noqa: ANN401
+    """Return a verified connection to the rpyc server running in *container*.
 
+    *host_port* and *socket_dir* have the same meaning as for
+    :func:`start_rpyc_server`.
+    """
     return _connect_with_retries(
-        container.get_container_host_ip(),
-        container.get_exposed_port(RPYC_PORT),
+        _rpyc_address(container, host_port, socket_dir),
         sync_request_timeout=sync_request_timeout,
     )
 
 
-def run_pickled[T](
-    conn: Any,  # noqa: ANN401
-    func: Callable[..., T],
-    *args: Any,  # noqa: ANN401
-    **kwargs: Any,  # noqa: ANN401
-) -> T:
-    """Serialize *func* with cloudpickle, send to container, execute there."""
-    module = sys.modules.get(func.__module__)
-    if module is not None:
-        cloudpickle.register_pickle_by_value(module)
+def bootstrap_container(
+    container: DockerContainer,
+    *,
+    sync_request_timeout: int = 30,
+    host_port: int | None = None,
+    socket_dir: str | None = None,
+) -> Any:  # noqa: ANN401
+    """Install dependencies, start rpyc server, and return a verified connection.
+
+    *host_port* and *socket_dir* have the same meaning as for
+    :func:`start_rpyc_server`.
+    """
+    _ = _run_bootstrap_script(
+        container, start_server=True, listen=listen_arg(host_port, socket_dir)
+    )
+    return connect_to_server(
+        container,
+        sync_request_timeout=sync_request_timeout,
+        host_port=host_port,
+        socket_dir=socket_dir,
+    )
+
+
+def pooled_connection(
+    container: DockerContainer, *, sync_request_timeout: int = 30
+) -> Any:  # noqa: ANN401
+    """Return a connection to *container*, bootstrapping it on first use.
+
+    Factories may yield the same long-lived container to many tests; only
+    the first of them pays for the bootstrap.
+    """
+    key = str(container.get_wrapped_container().id)
+    with _CONN_POOL_LOCK:
+        conn = _CONN_POOL.get(key)
+        if conn is None or conn.closed:
+            conn = bootstrap_container(
+                container, sync_request_timeout=sync_request_timeout
+            )
+            _CONN_POOL[key] = conn
+        else:
+            conn._config["sync_request_timeout"] = sync_request_timeout  # noqa: SLF001
+    return conn
+
+
+def _discard_if_stopped(container: DockerContainer) -> None:
+    """Drop the pooled connection of *container* once it no longer runs."""
+    from docker.errors import NotFound  # noqa: PLC0415
+
+    wrapped = container.get_wrapped_container()
+    try:
+        wrapped.reload()
+    except NotFound:
+        pass
+    else:
+        if wrapped.status == "running":
+            return
+    with _CONN_POOL_LOCK:
+        conn = _CONN_POOL.pop(str(wrapped.id), None)
+    if conn is not None:
+        conn.close()
+
+
+@atexit.register
+def _close_pooled_connections() -> None:
+    with _CONN_POOL_LOCK:
+        conns = list(_CONN_POOL.values())
+        _CONN_POOL.clear()
+    for conn in conns:
+        conn.close()
+
+
+@contextmanager
+def factory_connection(
+    factory: ContainerFactory, *, sync_request_timeout: int = 30
+) -> Iterator[Any]:
+    """Enter *factory* and yield a pooled connection to its container.
+
+    Once the factory exits, the connection is dropped from the pool if the
+    container was stopped, whether or not the test passed.
+    """
+    container: DockerContainer | None = None
+    try:
+        with factory(RPYC_PORT) as container:
+            yield pooled_connection(
+                container, sync_request_timeout=sync_request_timeout
+            )
+    finally:
+        if container is not None:
+            _discard_if_stopped(container)
+
+
+def _make_picklable(func: Callable[..., Any]) -> FunctionType:
+    """Return a shallow copy of *func* without its ``pytestmark`` attribute.
+
+    pytestmark references host-only objects (e.g. container factories) that
+    can't be unpickled in the container. Copying avoids mutating the original.
+    The copy shares ``__globals__`` with *func*, and functions without a
+    pytestmark are returned as-is, so nothing module-wide is rebuilt per test.
+    """
+    if isinstance(func, FunctionType) and "pytestmark" not in func.__dict__:
+        return func
 
-    # Pickle a shallow copy of the function, excluding pytestmark — it
-    # references host-only objects (e.g. container factories) that can't
-    # be unpickled in the container.  Copying avoids mutating the original.
     func_copy = FunctionType(
         func.__code__,
         func.__globals__,
@@ -200,12 +773,270 @@ def run_pickled[T](
     func_copy.__dict__.update(
         {k: v for k, v in func.__dict__.items() if k != "pytestmark"}
     )
-    try:
-        payload = cloudpickle.dumps(func_copy)
-    finally:
+    return func_copy
+
+
+def _dumps_by_value(obj: object, module_name: str) -> bytes:
+    """Serialize *obj* with cloudpickle, pickling *module_name* by value.
+
+    Test modules aren't importable in the container, so their functions and
+    classes have to travel by value.
+    """
+    import cloudpickle  # noqa: PLC0415
+
+    module = sys.modules.get(module_name)
+    with _PICKLE_LOCK:
         if module is not None:
-            cloudpickle.unregister_pickle_by_value(module)
+            cloudpickle.register_pickle_by_value(module)
+        try:
+            return cloudpickle.dumps(obj)
+        finally:
+            if module is not None:
+                cloudpickle.unregister_pickle_by_value(module)
+
+
+def _pickle_payload(func: Callable[..., Any]) -> bytes:
+    """Serialize *func* by value with cloudpickle, memoized per function.
+
+    Parametrized tests call the same function object repeatedly, so the
+    payload is computed once and reused until the function is collected.
+    """
+    if (payload := _PAYLOAD_CACHE.get(func)) is not None:
+        return payload
+
+    payload = _dumps_by_value(_make_picklable(func), func.__module__)
+    _PAYLOAD_CACHE[func] = payload
+    return payload
+
+
+def _load_remote(conn: Any, payload: bytes) -> Any:  # noqa: ANN401
+    """Unpickle *payload* in the container and return the remote object.
 
+    Large payloads (e.g. tests closing over big arrays) are written to a
+    remote buffer piecewise, so no single request carries the whole payload
+    and risks ``sync_request_timeout``.
+    """
     rpickle = conn.modules["pickle"]
-    remote_func = rpickle.loads(payload)
-    return remote_func(*args, **kwargs)
+    if len(payload) <= _PAYLOAD_CHUNK:
+        return rpickle.loads(payload)
+
+    remote_buf = conn.modules["io"].BytesIO()
+    view = memoryview(payload)
+    for start in range(0, len(view), _PAYLOAD_CHUNK):
+        remote_buf.write(bytes(view[start : start + _PAYLOAD_CHUNK]))
+    remote_buf.seek(0)
+    return rpickle.load(remote_buf)
+
+
+def _load_remotes(conn: Any, payloads: list[bytes]) -> list[Any]:  # noqa: ANN401
+    """Unpickle each of *payloads* in the container, as for :func:`_load_remote`.
+
+    Payloads that fit a single request are sent as async requests before
+    waiting for any reply, so loading several costs one round trip.
+    """
+    import rpyc  # noqa: PLC0415
+
+    loads = rpyc.async_(conn.modules["pickle"].loads)
+    pending = [
+        loads(payload) if len(payload) <= _PAYLOAD_CHUNK else None
+        for payload in payloads
+    ]
+    timeout = conn._config["sync_request_timeout"]  # noqa: SLF001
+    for result in pending:
+        if result is not None:
+            result.set_expiry(timeout)
+    return [
+        _load_remote(conn, payload) if result is None else result.value
+        for payload, result in zip(payloads, pending, strict=True)
+    ]
+
+
+def _remote_functions(conn: Any, *funcs: Callable[..., Any]) -> list[Any]:  # noqa: ANN401
+    """Return *funcs* unpickled in the container, registering them on first use.
+
+    The registry is stored on *conn* and keyed weakly on the host functions,
+    so it lives and dies with the connection and never keeps tests alive.
+    """
+    registry = conn.__dict__.get(_REMOTE_FUNCS_ATTR)
+    if registry is None:
+        registry = conn.__dict__[_REMOTE_FUNCS_ATTR] = weakref.WeakKeyDictionary()
+    missing = [func for func in dict.fromkeys(funcs) if func not in registry]
+    if missing:
+        payloads = [_pickle_payload(func) for func in missing]
+        registry.update(zip(missing, _load_remotes(conn, payloads), strict=True))
+    return [registry[func] for func in funcs]
+
+
+# The functions below run in the container. They're pickled by value, which
+# evaluates their annotations, so those may only use runtime names.
+
+
+def _dump_result(result: Any) -> tuple[bool, Any]:  # noqa: ANN401
+    """Return *result* for the host, pickled unless rpyc sends it by value.
+
+    The host would otherwise get a netref and pay a round trip for every
+    item or attribute it reads, and the netref dies with the container.
+    Plain pickle keeps importable types by reference; cloudpickle covers
+    classes that only exist by value (e.g. from the test module). Results
+    neither can pickle are returned as netrefs.
+    """
+    import cloudpickle  # noqa: PLC0415
+    from rpyc.core import brine  # noqa: PLC0415
+
+    if brine.dumpable(result):
+        return False, result
+    for dumps in (pickle.dumps, cloudpickle.dumps):
+        try:
+            return True, dumps(result)
+        except pickle.PicklingError, TypeError, AttributeError:
+            pass
+    return False, result
+
+
+def _call(func: Any, /, *args: Any, **kwargs: Any) -> tuple[bool, Any]:  # noqa: ANN401
+    """Call *func* and return its result through :func:`_dump_result`."""
+    return _dump_result(func(*args, **kwargs))
+
+
+def _apply(func: Any, packed: tuple[Any, Any]) -> tuple[bool, Any]:  # noqa: ANN401
+    """Call *func* with unpickled arguments, as for :func:`_call`."""
+    args, kwargs = packed
+    return _call(func, *args, **kwargs)
+
+
+def _pack_arguments(
+    func: Callable[..., Any], args: tuple[Any, ...], kwargs: dict[str, Any]
+) -> bytes | None:
+    """Pickle the arguments for *func* as one payload, if that's worthwhile.
+
+    rpyc sends immutable builtins by value, but every other argument (a
+    fixture's dict or dataclass) goes as a netref that the container then
+    reads attribute by attribute. Returns None when all arguments go by
+    value anyway, or when they can't be pickled and have to stay netrefs.
+    The container gets copies: changes the test makes to them don't reach
+    the host's objects.
+    """
+    from rpyc.core import brine  # noqa: PLC0415
+
+    if all(brine.dumpable(value) for value in (*args, *kwargs.values())):
+        return None
+    try:
+        return _dumps_by_value((args, kwargs), func.__module__)
+    except pickle.PicklingError, TypeError, AttributeError:
+        return None
+
+
+def _load_each_argument(
+    conn: Any,  # noqa: ANN401
+    func: Callable[..., Any],
+    args: tuple[Any, ...],
+    kwargs: dict[str, Any],
+) -> tuple[tuple[Any, ...], dict[str, Any]]:
+    """Return *args* and *kwargs*, each unpickled in the container if it can be.
+
+    Arguments the container can't load, e.g. instances of a class defined in
+    a conftest, stay host objects and reach the test as netrefs.
+    """
+    from rpyc.core import brine  # noqa: PLC0415
+
+    def load(value: Any) -> Any:  # noqa: ANN401
+        if brine.dumpable(value):
+            return value
+        try:
+            return _load_remote(conn, _dumps_by_value(value, func.__module__))
+        except pickle.PicklingError, TypeError, AttributeError, ImportError:
+            return value
+
+    return tuple(map(load, args)), {name: load(v) for name, v in kwargs.items()}
+
+
+@dataclass(frozen=True, slots=True)
+class PickledCall[T]:
+    """A call of *func* whose pickling was started by :func:`pickle_call`."""
+
+    func: Callable[..., T]
+    args: tuple[Any, ...]
+    kwargs: dict[str, Any]
+    packed: Future[bytes | None]
+
+
+@functools.cache
+def _pickle_executor() -> ThreadPoolExecutor:
+    # Pickling holds the GIL, so one thread is enough to overlap it with the
+    # container start, which mostly waits on Docker.
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="pytest-in-docker")
+
+
+def _pickle_for_call(
+    func: Callable[..., Any], args: tuple[Any, ...], kwargs: dict[str, Any]
+) -> bytes | None:
+    _ = _pickle_payload(func)
+    return _pack_arguments(func, args, kwargs)
+
+
+def pickle_call[T](
+    func: Callable[..., T],
+    *args: Any,  # noqa: ANN401
+    **kwargs: Any,  # noqa: ANN401
+) -> PickledCall[T]:
+    """Start pickling a call of *func* with *args* and *kwargs* in the background.
+
+    Call this before starting the container, so that serializing a test
+    with large fixture values overlaps with the container start instead of
+    following it.
+    """
+    packed = _pickle_executor().submit(_pickle_for_call, func, args, kwargs)
+    return PickledCall(func, args, kwargs, packed)
+
+
+def run_call[T](conn: Any, call: PickledCall[T]) -> T:  # noqa: ANN401
+    """Execute *call* in the container behind *conn* and return its result.
+
+    After the first call on a connection, calling the same function again
+    is a single rpyc request, plus one carrying the pickled arguments when
+    any of them isn't a plain builtin value. If the container can't load
+    those, e.g. for lack of a host-only module, each argument is loaded on
+    its own and the ones that still fail are passed as netrefs. The result
+    comes back pickled in the same response.
+
+    Raises:
+        ResultUnpicklingError: If the result is pickled by reference to a
+            module or attribute the host doesn't have.
+
+    """
+    packed = call.packed.result()
+    remote_args = None
+    if packed is not None:
+        # An argument whose type the container can't import fails the load.
+        with suppress(ImportError, AttributeError):
+            remote_args = _load_remote(conn, packed)
+    if remote_args is not None:
+        remote_func, apply = _remote_functions(conn, call.func, _apply)
+        pickled, result = apply(remote_func, remote_args)
+    else:
+        args, kwargs = call.args, call.kwargs
+        if packed is not None:
+            args, kwargs = _load_each_argument(conn, call.func, args, kwargs)
+        remote_func, call_remote = _remote_functions(conn, call.func, _call)
+        pickled, result = call_remote(remote_func, *args, **kwargs)
+    if not pickled:
+        return result
+    try:
+        return pickle.loads(result)  # noqa: S301
+    except (ImportError, AttributeError) as exc:
+        msg = (
+            f"The value returned by {call.func.__qualname__} in the container "
+            f"can't be loaded on the host ({exc}). Install the package that "
+            f"defines its type on the host, or return plain values."
+        )
+        raise ResultUnpicklingError(msg) from exc
+
+
+def run_pickled[T](
+    conn: Any,  # noqa: ANN401
+    func: Callable[..., T],
+    *args: Any,  # noqa: ANN401
+    **kwargs: Any,  # noqa: ANN401
+) -> T:
+    """Serialize *func* with cloudpickle, send to container, execute there."""
+    return run_call(conn, pickle_call(func, *args, **kwargs))
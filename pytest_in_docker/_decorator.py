@@ -1,14 +1,14 @@
 """The in_container decorator for running tests inside Docker containers."""
 
-from typing import TYPE_CHECKING, ParamSpec, TypeVar, overload
+import functools
+from typing import TYPE_CHECKING, Any, ParamSpec, TypeVar, overload
 
 if TYPE_CHECKING:
     from collections.abc import Callable
+    from contextlib import AbstractContextManager
 
-from testcontainers.core.container import DockerContainer
-from testcontainers.core.image import DockerImage
-
-from pytest_in_docker._container import RPYC_PORT, bootstrap_container, run_pickled
+from pytest_in_docker._container import factory_connection, pickle_call, run_call
+from pytest_in_docker._session import spec_connection
 from pytest_in_docker._types import (
     BuildSpec,
     ContainerFactory,
@@ -20,6 +20,10 @@ from pytest_in_docker._types import (
 P = ParamSpec("P")
 T = TypeVar("T")
 
+# Attribute on decorated tests holding their container spec, so the plugin
+# can start session containers for them right after collection.
+DECORATED_SPEC_ATTR = "_pytest_in_docker_spec"
+
 
 @overload
 def in_container(image: str) -> Callable[[Callable[P, T]], Callable[P, T]]: ...
@@ -48,7 +52,9 @@ def in_container(
 
     The decorated test is serialised with cloudpickle, sent to the container
     over RPyC, deserialised there, and the result (or exception) is returned
-    to the host.
+    to the host. Returned values other than plain builtins are pickled
+    back, so their types must be importable on the host as well; values
+    that can't be pickled at all come back as RPyC proxies.
 
     Three mutually exclusive ways to specify the container are supported:
 
@@ -105,43 +111,30 @@ def in_container(
     Raises:
         InvalidContainerSpecError: If the arguments don't match any of the
             three supported modes.
+        ResultUnpicklingError: From the decorated function, if its return
+            value has a type that can't be imported on the host.
 
     """
     container_spec = build_container_spec_from_args(
         image, path=path, tag=tag, factory=factory
     )
 
+    # The spec is fixed at decoration time, so is the way to connect to it.
+    connect: Callable[[], AbstractContextManager[Any]]
+    match container_spec:
+        case ImageSpec() | BuildSpec():
+            connect = functools.partial(spec_connection, container_spec)
+        case FactorySpec():
+            connect = functools.partial(factory_connection, container_spec.factory)
+
     def decorator(func: Callable[P, T]) -> Callable[P, T]:
+        @functools.wraps(func)
         def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
-            def _run_in_container(c: DockerContainer) -> T:
-                conn = bootstrap_container(c)
-                return run_pickled(conn, func, *args, **kwargs)
-
-            def _run_image_spec(image: ImageSpec) -> T:
-                with (
-                    DockerContainer(image.image)
-                    .with_command("sleep infinity")
-                    .with_exposed_ports(RPYC_PORT) as container
-                ):
-                    started = container.start()
-                    return _run_in_container(started)
-
-            def _run_build_spec(build_spec: BuildSpec) -> T:
-                with DockerImage(path=build_spec.path, tag=build_spec.tag) as built:
-                    return _run_image_spec(ImageSpec(image=str(built)))
-
-            def _run_factory_spec(factory_spec: FactorySpec) -> T:
-                with factory_spec.factory(RPYC_PORT) as container:
-                    return _run_in_container(container)
-
-            match container_spec:
-                case ImageSpec():
-                    return _run_image_spec(container_spec)
-                case BuildSpec():
-                    return _run_build_spec(container_spec)
-                case FactorySpec():
-                    return _run_factory_spec(container_spec)
+            call = pickle_call(func, *args, **kwargs)
+            with connect() as conn:
+                return run_call(conn, call)
 
+        setattr(wrapper, DECORATED_SPEC_ATTR, container_spec)
         return wrapper
 
     return decorator
@@ -0,0 +1,367 @@
+"""Prepared-image cache that skips dependency installation on repeat runs.
+
+docker is imported where it's first needed, like in ``_container``.
+"""
+
+import hashlib
+import importlib.metadata
+import io
+import os
+import pathlib
+import socket
+import sys
+import tempfile
+from contextlib import contextmanager, suppress
+from typing import TYPE_CHECKING, Any
+
+from pytest_in_docker._container import (
+    CONTAINER_DEPS,
+    INSTALLED_MARKER,
+    PIP_INSTALL_FLAGS,
+    RPYC_PORT,
+    RPYC_SERVER_PATH,
+    RPYC_SERVER_SCRIPT,
+    RPYC_SOCKET_DIR,
+    VENDORED_PACKAGES,
+    VENV_DIR,
+    bootstrap_container,
+    build_context,
+    connect_to_server,
+    docker_container,
+    docker_image,
+    listen_arg,
+    prepare_container,
+    shared_docker_client,
+    start_rpyc_server,
+)
+from pytest_in_docker._types import ContainerPrepareError
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+    from testcontainers.core.container import DockerContainer
+
+CACHE_REPOSITORY = "pytest-in-docker-cache"
+CACHE_ENV_VAR = "PYTEST_IN_DOCKER_CACHE"
+HOST_NET_ENV_VAR = "PYTEST_IN_DOCKER_HOST_NET"
+UNIX_SOCKET_ENV_VAR = "PYTEST_IN_DOCKER_UNIX_SOCKET"
+_PREPARED_PYTHON_ENV = "PYTEST_IN_DOCKER_PYTHON"
+_BAKED_DOCKERFILE = f"""
+FROM {{base}}
+RUN python3 -m venv {VENV_DIR} \\
+    && {VENV_DIR}/bin/python -m pip install {PIP_INSTALL_FLAGS} \\
+        {" ".join(CONTAINER_DEPS)} \\
+    && touch {INSTALLED_MARKER}
+"""
+_PYTHON_MINOR = f"{sys.version_info.major}.{sys.version_info.minor}"
+_VERSION_CHECK = (
+    "import sys; v = '%d.%d' % sys.version_info[:2]; "
+    f"sys.exit(v != '{_PYTHON_MINOR}' and "
+    f"'Python version mismatch: host has {_PYTHON_MINOR} but image has ' + v)"
+)
+# The deps layer comes first so Docker's cache keeps it across server changes.
+_PREBAKED_DOCKERFILE = f"""
+FROM {{base}}
+RUN python3 -c "{_VERSION_CHECK}" \\
+    && python3 -m venv {VENV_DIR} \\
+    && {VENV_DIR}/bin/python -m pip install {PIP_INSTALL_FLAGS} \\
+        {" ".join(CONTAINER_DEPS)} \\
+    && touch {INSTALLED_MARKER}
+ADD server.tar {RPYC_SERVER_PATH.parent}/
+"""
+_PREBAKED_TAG_PREFIX = "prebaked-"
+_BAKED_TAG_PREFIX = "baked-"
+
+_prebake = False
+
+
+def cache_enabled() -> bool:
+    """Return whether the prepared-image cache is enabled for this process."""
+    return os.environ.get(CACHE_ENV_VAR) == "1"
+
+
+def set_prebake(enabled: bool) -> None:  # noqa: FBT001
+    """Set whether image containers start from a prebaked derived image."""
+    global _prebake  # noqa: PLW0603
+    _prebake = enabled
+
+
+def prebake_enabled() -> bool:
+    """Return whether image containers start from a prebaked derived image."""
+    return _prebake
+
+
+def host_network_enabled() -> bool:
+    """Return whether containers should share the host's network namespace.
+
+    Only honoured on Linux, where the Docker daemon runs on the host kernel;
+    elsewhere host networking does not reach the host running pytest.
+    """
+    return os.environ.get(HOST_NET_ENV_VAR) == "1" and sys.platform == "linux"
+
+
+def unix_socket_enabled() -> bool:
+    """Return whether the rpyc server is reached over a bind-mounted Unix socket.
+
+    Only honoured on Linux, where a socket bound in a container is usable
+    from the host through the mount; Docker Desktop's file sharing does not
+    carry sockets across its VM.
+    """
+    return os.environ.get(UNIX_SOCKET_ENV_VAR) == "1" and sys.platform == "linux"
+
+
+@contextmanager
+def _socket_dir() -> Iterator[str | None]:
+    """Yield a host directory for the rpyc server's socket, or None for TCP.
+
+    The directory is writable by everyone, like ``/tmp``, since the server
+    runs as the image's user rather than the host user who owns it.
+    """
+    if not unix_socket_enabled():
+        yield None
+        return
+    with tempfile.TemporaryDirectory(prefix="pytest-in-docker-") as path:
+        pathlib.Path(path).chmod(0o1777)
+        yield path
+
+
+def _free_host_port() -> int:
+    """Return a currently unused TCP port on the host's loopback interface."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _cache_digest(base: str) -> str:
+    """Return a digest of *base* and everything installed on top of it."""
+    script = hashlib.sha256(RPYC_SERVER_SCRIPT.encode()).hexdigest()
+    vendored = (
+        f"{name}=={importlib.metadata.version(name)}" for name in VENDORED_PACKAGES
+    )
+    deps = ",".join((*CONTAINER_DEPS, *vendored))
+    key = f"{base}\0{deps}\0{_PYTHON_MINOR}\0{script}"
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def cache_tag_for(base: str) -> str:
+    """Return the deterministic cache tag for a prepared *base* image."""
+    return f"{CACHE_REPOSITORY}:{_cache_digest(base)}"
+
+
+def prebaked_tag_for(base: str) -> str:
+    """Return the deterministic tag of the prebaked image derived from *base*."""
+    return f"{CACHE_REPOSITORY}:{_PREBAKED_TAG_PREFIX}{_cache_digest(base)}"
+
+
+def baked_tag_for(image_id: str) -> str:
+    """Return the deterministic tag of the deps image baked on image *image_id*."""
+    return f"{CACHE_REPOSITORY}:{_BAKED_TAG_PREFIX}{_cache_digest(image_id)}"
+
+
+def cached_image_for(base: str) -> str | None:
+    """Return the prepared image tag for *base*, or None if absent or disabled."""
+    if not cache_enabled():
+        return None
+
+    from docker.errors import ImageNotFound  # noqa: PLC0415
+
+    tag = cache_tag_for(base)
+    try:
+        _ = shared_docker_client().client.images.get(tag)
+    except ImageNotFound:
+        return None
+    return tag
+
+
+def prebaked_image(base: str) -> str:
+    """Return the prebaked image for *base*, building it if it doesn't exist.
+
+    The image has the deps installed in a venv and the rpyc server uploaded,
+    so its containers only need the server started. Docker's image store is
+    the cache: the tag covers everything that goes into the image.
+    """
+    tag = prebaked_tag_for(base)
+    _build_once(tag, _PREBAKED_DOCKERFILE.format(base=base), f"prebake {base}")
+    return tag
+
+
+def _build_once(tag: str, dockerfile: str, what: str) -> None:
+    """Build *dockerfile* as *tag* unless the image already exists."""
+    from docker.errors import BuildError, ImageNotFound  # noqa: PLC0415
+
+    client = shared_docker_client().client
+    try:
+        _ = client.images.get(tag)
+    except ImageNotFound:
+        pass
+    else:
+        return
+
+    context = build_context(dockerfile)
+    try:
+        _ = client.images.build(
+            fileobj=io.BytesIO(context), custom_context=True, tag=tag, rm=True
+        )
+    except BuildError as exc:
+        log = "".join(chunk.get("stream", "") for chunk in exc.build_log)
+        msg = f"Failed to {what}: {exc.msg}\n{log}"
+        raise ContainerPrepareError(msg) from exc
+
+
+def _commit_prepared_image(
+    container: DockerContainer, base: str, python: pathlib.Path
+) -> None:
+    """Snapshot a freshly prepared container as the cached image for *base*."""
+    if container._container is None:  # noqa: SLF001
+        msg = "Container is not running."
+        raise RuntimeError(msg)
+
+    repository, _, tag = cache_tag_for(base).rpartition(":")
+    _ = container._container.commit(  # noqa: SLF001
+        repository=repository,
+        tag=tag,
+        changes=[f"ENV {_PREPARED_PYTHON_ENV}={python}"],
+    )
+
+
+def evict_cached_images(*, tags: Iterable[str] | None = None) -> list[str]:
+    """Remove prepared and prebaked images from the local Docker daemon.
+
+    Args:
+        tags: Only remove these tags, e.g. ``cache_tag_for(base)``. By
+            default every image in the cache repository is removed.
+
+    Returns:
+        The tags that were removed.
+
+    """
+    from docker.errors import ImageNotFound  # noqa: PLC0415
+
+    client = shared_docker_client().client
+    removed: list[str] = []
+    if tags is not None:
+        for tag in tags:
+            try:
+                client.images.remove(tag, force=True)
+            except ImageNotFound:
+                continue
+            removed.append(tag)
+        return removed
+    for image in client.images.list(name=CACHE_REPOSITORY):
+        removed.extend(image.tags)
+        client.images.remove(image.id, force=True)
+    return removed
+
+
+@contextmanager
+def image_container(
+    image: str, *, sync_request_timeout: int = 30, cacheable: bool = True
+) -> Iterator[Any]:
+    """Start a container from *image* and yield a verified rpyc connection.
+
+    With prebaking enabled, the container starts from the prebaked image
+    for *image* with the rpyc server as its command, so nothing is run in
+    it before connecting. Otherwise, when the cache is enabled and a
+    prepared image for *image* exists, the container starts from it and
+    only the rpyc server is launched. Failing both, the container is
+    bootstrapped as usual and, if the cache is enabled, committed so later
+    runs can skip the bootstrap.
+
+    Pass ``cacheable=False`` for images that are removed after the test
+    (e.g. built from a Dockerfile): a committed or prebaked child would
+    block removal.
+    """
+    prebake = cacheable and prebake_enabled()
+    cacheable = cacheable and not prebake and cache_enabled()
+    cached = cached_image_for(image) if cacheable else None
+    with _socket_dir() as socket_dir:
+        # Host networking skips Docker's port proxy; every container then
+        # needs its own port since they all share the host's namespace. A
+        # Unix socket skips the network entirely and needs neither.
+        use_host_net = socket_dir is None and host_network_enabled()
+        host_port = _free_host_port() if use_host_net else None
+        if prebake:
+            container = docker_container(prebaked_image(image)).with_command(
+                f"{VENV_DIR}/bin/python {RPYC_SERVER_PATH} "
+                f"{listen_arg(host_port, socket_dir)}"
+            )
+        else:
+            container = docker_container(cached or image).with_command("sleep infinity")
+        if socket_dir is not None:
+            container = container.with_volume_mapping(
+                socket_dir, str(RPYC_SOCKET_DIR), "rw"
+            )
+        elif host_port is None:
+            container = container.with_exposed_ports(RPYC_PORT)
+        else:
+            container = container.with_kwargs(network_mode="host")
+        with container:
+            if prebake:
+                yield connect_to_server(
+                    container,
+                    sync_request_timeout=sync_request_timeout,
+                    host_port=host_port,
+                    socket_dir=socket_dir,
+                )
+                return
+            if cached is None and not cacheable:
+                yield bootstrap_container(
+                    container,
+                    sync_request_timeout=sync_request_timeout,
+                    host_port=host_port,
+                    socket_dir=socket_dir,
+                )
+                return
+            if cached is not None:
+                # The interpreter path was recorded in the image environment
+                # at commit time; let the container's shell expand it.
+                python: pathlib.Path | str = f'"${_PREPARED_PYTHON_ENV}"'
+            else:
+                python = prepare_container(container)
+                _commit_prepared_image(container, image, python)
+            yield start_rpyc_server(
+                container,
+                python,
+                sync_request_timeout=sync_request_timeout,
+                host_port=host_port,
+                socket_dir=socket_dir,
+            )
+
+
+def baked_image(base: str, image_id: str) -> str:
+    """Return an image of *base* with the container deps installed in a venv.
+
+    It is built on first use and kept, tagged after *base*'s *image_id*, so
+    later builds of an unchanged Dockerfile find it and never invoke pip.
+    :func:`evict_cached_images` removes it along with the other cached images.
+    """
+    tag = baked_tag_for(image_id)
+    _build_once(tag, _BAKED_DOCKERFILE.format(base=base), f"bake {base}")
+    return tag
+
+
+@contextmanager
+def built_image_container(
+    path: str, tag: str, *, sync_request_timeout: int = 30
+) -> Iterator[Any]:
+    """Build the image at *path*, bake in the deps, and yield a connection.
+
+    Only *tag* is removed afterwards: its layers stay as the parents of the
+    baked image, so the next build of the same Dockerfile is a cache hit.
+    """
+    from docker.errors import ImageNotFound  # noqa: PLC0415
+
+    built = docker_image(path, tag)
+    built.clean_up = False
+    image_id = built.build().short_id
+    try:
+        with image_container(
+            baked_image(tag, image_id),
+            sync_request_timeout=sync_request_timeout,
+            cacheable=False,
+        ) as conn:
+            yield conn
+    finally:
+        # Without force, an image with children is only untagged.
+        with suppress(ImageNotFound):
+            shared_docker_client().client.images.remove(tag)
@@ -4,10 +4,26 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING, Any
 
-from testcontainers.core.container import DockerContainer
-from testcontainers.core.image import DockerImage
+import pytest
 
-from pytest_in_docker._container import RPYC_PORT, bootstrap_container, run_pickled
+from pytest_in_docker._container import (
+    close_shared_docker_client,
+    factory_connection,
+    pickle_call,
+    run_call,
+)
+from pytest_in_docker._decorator import DECORATED_SPEC_ATTR
+from pytest_in_docker._image_cache import set_prebake
+from pytest_in_docker._session import (
+    REUSE_FUNCTION,
+    REUSE_SCOPES,
+    close_session_connections,
+    prewarm,
+    release_warm,
+    set_parallelism,
+    set_reuse_scope,
+    spec_connection,
+)
 from pytest_in_docker._types import (
     BuildSpec,
     ContainerSpec,
@@ -19,12 +35,43 @@ from pytest_in_docker._types import (
 )
 
 if TYPE_CHECKING:
-    import pytest
+    from collections.abc import Iterable
+
     from _pytest.python import Function
 
 
+def pytest_addoption(parser: pytest.Parser) -> None:
+    """Add the in-docker command line options."""
+    group = parser.getgroup("in-docker")
+    group.addoption(
+        "--in-docker-reuse",
+        choices=REUSE_SCOPES,
+        default=REUSE_FUNCTION,
+        help="Start a fresh container for every test ('function', the default) "
+        "or share one per image across the session ('session').",
+    )
+    group.addoption(
+        "--in-docker-prebake",
+        action="store_true",
+        default=False,
+        help="Build a derived image per base image with the container deps and "
+        "rpyc server baked in, and start containers from it.",
+    )
+    group.addoption(
+        "--in-docker-parallel",
+        type=int,
+        default=0,
+        metavar="N",
+        help="With --in-docker-reuse=function, keep up to N fresh containers "
+        "starting ahead of the tests that will use them (default: 0, off).",
+    )
+
+
 def pytest_configure(config: pytest.Config) -> None:
-    """Register the in_container marker."""
+    """Register the in_container marker and apply the in-docker options."""
+    set_reuse_scope(str(config.getoption("in_docker_reuse")))
+    set_prebake(bool(config.getoption("in_docker_prebake")))
+    set_parallelism(int(config.getoption("in_docker_parallel") or 0))
     config.addinivalue_line(
         "markers",
         "in_container(image | path+tag | factory): "
@@ -52,6 +99,68 @@ def _resolve_container_spec(
     raise NoContainerSpecifiedError(msg)
 
 
+def _collected_spec(item: pytest.Item) -> ContainerSpec | None:
+    """Return the container spec of a collected *item*, if it can be known yet.
+
+    Fixtures aren't resolved during collection, so an ``image`` argument is
+    only found when it comes from ``@pytest.mark.parametrize``. Tests using
+    the ``in_container`` decorator carry their spec on the function.
+    """
+    marker = item.get_closest_marker("in_container")
+    if marker is None:
+        return getattr(getattr(item, "obj", None), DECORATED_SPEC_ATTR, None)
+    callspec = getattr(item, "callspec", None)
+    params = callspec.params if callspec is not None else {}
+    try:
+        return _resolve_container_spec(marker, params)
+    except InvalidContainerSpecError, NoContainerSpecifiedError:
+        # Reported when the test runs.
+        return None
+
+
+def _prewarm_items(items: Iterable[pytest.Item]) -> None:
+    specs = {item.nodeid: _collected_spec(item) for item in items}
+    prewarm(
+        {
+            test_id: spec
+            for test_id, spec in specs.items()
+            if isinstance(spec, ImageSpec | BuildSpec)
+        }
+    )
+
+
+def _xdist_worker(config: pytest.Config) -> bool:
+    """Return whether this process is a pytest-xdist worker."""
+    return hasattr(config, "workerinput")
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_collection_modifyitems(
+    config: pytest.Config, items: list[pytest.Item]
+) -> None:
+    """Start the containers of the collected tests in the background.
+
+    Runs last, so tests deselected by ``-k``, ``-m`` and other plugins are
+    already gone from *items*. An xdist worker collects every test but only
+    runs the ones it's sent, so it prewarms each test's successor instead,
+    in :func:`pytest_runtest_protocol`.
+    """
+    if _xdist_worker(config):
+        return
+    _prewarm_items(items)
+
+
+def pytest_runtest_protocol(item: pytest.Item, nextitem: pytest.Item | None) -> None:
+    """On xdist workers, start the next scheduled test's container in the background."""
+    if nextitem is not None and _xdist_worker(item.config):
+        _prewarm_items([nextitem])
+
+
+def pytest_runtest_teardown(item: pytest.Item) -> None:
+    """Stop the container started ahead for *item* if it never claimed it."""
+    release_warm(item.nodeid, sync_request_timeout=_get_timeout(item))
+
+
 def _run_test_in_container(
     func: Any,  # noqa: ANN401
     container_spec: ContainerSpec,
@@ -60,41 +169,23 @@ def _run_test_in_container(
     sync_request_timeout: int = 30,
 ) -> None:
     """Run a test function inside a Docker container."""
-    if isinstance(container_spec, ImageSpec):
-        with (
-            DockerContainer(container_spec.image)
-            .with_command("sleep infinity")
-            .with_exposed_ports(RPYC_PORT) as container
-        ):
-            started = container.start()
-            conn = bootstrap_container(
-                started, sync_request_timeout=sync_request_timeout
-            )
-            run_pickled(conn, func, **test_kwargs)
-    elif isinstance(container_spec, BuildSpec):
-        with (
-            DockerImage(path=container_spec.path, tag=container_spec.tag) as image,
-            DockerContainer(str(image))
-            .with_command("sleep infinity")
-            .with_exposed_ports(RPYC_PORT) as container,
-        ):
-            started = container.start()
-            conn = bootstrap_container(
-                started, sync_request_timeout=sync_request_timeout
-            )
-            run_pickled(conn, func, **test_kwargs)
+    call = pickle_call(func, **test_kwargs)
+    if isinstance(container_spec, ImageSpec | BuildSpec):
+        with spec_connection(
+            container_spec, sync_request_timeout=sync_request_timeout
+        ) as conn:
+            run_call(conn, call)
     elif isinstance(container_spec, FactorySpec):
-        with container_spec.factory(RPYC_PORT) as container:
-            conn = bootstrap_container(
-                container, sync_request_timeout=sync_request_timeout
-            )
-            run_pickled(conn, func, **test_kwargs)
+        with factory_connection(
+            container_spec.factory, sync_request_timeout=sync_request_timeout
+        ) as conn:
+            run_call(conn, call)
     else:
         msg = "Invalid container specification."
         raise InvalidContainerSpecError(msg)
 
 
-def _get_timeout(pyfuncitem: Function) -> int:
+def _get_timeout(pyfuncitem: pytest.Item) -> int:
     """Read the pytest timeout marker, falling back to the ini default or 30s."""
     timeout_marker = pyfuncitem.get_closest_marker("timeout")
     if timeout_marker and timeout_marker.args:
@@ -126,3 +217,9 @@ def pytest_pyfunc_call(pyfuncitem: Function) -> object | None:
         sync_request_timeout=_get_timeout(pyfuncitem),
     )
     return True
+
+
+def pytest_sessionfinish() -> None:
+    """Stop the containers kept alive for the session and close the client."""
+    close_session_connections()
+    close_shared_docker_client()
@@ -0,0 +1,252 @@
+"""Session-scoped reuse of image containers across tests."""
+
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import AbstractContextManager, ExitStack, contextmanager
+from typing import TYPE_CHECKING, Any
+
+from pytest_in_docker._image_cache import built_image_container, image_container
+from pytest_in_docker._types import BuildSpec, ImageSpec
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Mapping
+
+REUSE_FUNCTION = "function"
+REUSE_SESSION = "session"
+REUSE_SCOPES = (REUSE_FUNCTION, REUSE_SESSION)
+
+_reuse_scope = REUSE_FUNCTION
+_parallelism = 0
+
+# Session containers, started (or starting) in the background, each with the
+# stack that tears it down.
+_SESSION_FUTURES: dict[ImageSpec | BuildSpec, Future[tuple[ExitStack, Any]]] = {}
+# With the function scope, fresh containers started ahead of the tests and
+# not yet claimed, the tests still to be started, in collection order, and
+# the tests that had a container started and haven't finished yet, each
+# with its spec.
+_WARM_FUTURES: dict[ImageSpec | BuildSpec, deque[Future[tuple[ExitStack, Any]]]] = {}
+_UPCOMING: OrderedDict[str, ImageSpec | BuildSpec] = OrderedDict()
+_STARTED_AHEAD: dict[str, ImageSpec | BuildSpec] = {}
+_SESSION_LOCK = threading.Lock()
+_executor: ThreadPoolExecutor | None = None
+
+
+def set_reuse_scope(scope: str) -> None:
+    """Set whether image containers live per test or per session."""
+    global _reuse_scope  # noqa: PLW0603
+    _reuse_scope = scope
+
+
+def session_scoped() -> bool:
+    """Return whether image containers are shared across the session."""
+    return _reuse_scope == REUSE_SESSION
+
+
+def set_parallelism(count: int) -> None:
+    """Set how many fresh containers may be started ahead of their tests."""
+    global _parallelism  # noqa: PLW0603
+    _parallelism = max(count, 0)
+
+
+def _open_connection(
+    spec: ImageSpec | BuildSpec, sync_request_timeout: int
+) -> AbstractContextManager[Any]:
+    if isinstance(spec, ImageSpec):
+        return image_container(spec.image, sync_request_timeout=sync_request_timeout)
+    return built_image_container(
+        spec.path, spec.tag, sync_request_timeout=sync_request_timeout
+    )
+
+
+def _start(
+    spec: ImageSpec | BuildSpec, sync_request_timeout: int
+) -> tuple[ExitStack, Any]:
+    stack = ExitStack()
+    conn = stack.enter_context(_open_connection(spec, sync_request_timeout))
+    return stack, conn
+
+
+def _submit_start(
+    spec: ImageSpec | BuildSpec, sync_request_timeout: int
+) -> Future[tuple[ExitStack, Any]]:
+    """Start a container for *spec* in the background; ``_SESSION_LOCK`` is held."""
+    global _executor  # noqa: PLW0603
+    if _executor is None:
+        _executor = ThreadPoolExecutor(thread_name_prefix="pytest-in-docker")
+    return _executor.submit(_start, spec, sync_request_timeout)
+
+
+def _session_future(
+    spec: ImageSpec | BuildSpec, sync_request_timeout: int
+) -> Future[tuple[ExitStack, Any]]:
+    """Return the future for *spec*'s session container, starting it if needed."""
+    with _SESSION_LOCK:
+        future = _SESSION_FUTURES.get(spec)
+        if future is None:
+            future = _submit_start(spec, sync_request_timeout)
+            _SESSION_FUTURES[spec] = future
+        return future
+
+
+def _fill_warm(sync_request_timeout: int) -> None:
+    """Start upcoming containers until ``_parallelism`` are warming or waiting.
+
+    ``_SESSION_LOCK`` is held.
+    """
+    warming = sum(len(queue) for queue in _WARM_FUTURES.values())
+    while _UPCOMING and warming < _parallelism:
+        test_id, spec = _UPCOMING.popitem(last=False)
+        future = _submit_start(spec, sync_request_timeout)
+        _WARM_FUTURES.setdefault(spec, deque()).append(future)
+        _STARTED_AHEAD[test_id] = spec
+        warming += 1
+
+
+def _claim_warm(
+    spec: ImageSpec | BuildSpec, sync_request_timeout: int
+) -> Future[tuple[ExitStack, Any]] | None:
+    """Take the oldest container started ahead for *spec*, if there is one.
+
+    A test that runs out of collection order finds none, and its place in
+    the upcoming specs is given up so no container is started for it later.
+    """
+    with _SESSION_LOCK:
+        queue = _WARM_FUTURES.get(spec)
+        future = queue.popleft() if queue else None
+        if future is None:
+            test_id = next((t for t, s in _UPCOMING.items() if s == spec), None)
+            if test_id is not None:
+                del _UPCOMING[test_id]
+        _fill_warm(sync_request_timeout)
+        return future
+
+
+def _stop_started(future: Future[tuple[ExitStack, Any]]) -> None:
+    if future.cancelled() or future.exception() is not None:
+        return
+    stack, conn = future.result()
+    conn.close()
+    stack.close()
+
+
+def release_warm(test_id: str, *, sync_request_timeout: int = 30) -> None:
+    """Give up the container started ahead for *test_id*, once it has finished.
+
+    A test that is skipped, fails in setup or otherwise never reaches its
+    container leaves one unclaimed; it is stopped, and its slot given to the
+    next upcoming test. Containers for equal specs are interchangeable, so
+    what is kept is one unclaimed container per unfinished test of the spec.
+    """
+    with _SESSION_LOCK:
+        _UPCOMING.pop(test_id, None)
+        spec = _STARTED_AHEAD.pop(test_id, None)
+        if spec is None:
+            return
+        unfinished = sum(1 for s in _STARTED_AHEAD.values() if s == spec)
+        queue = _WARM_FUTURES.get(spec, deque())
+        unclaimed: list[Future[tuple[ExitStack, Any]]] = []
+        while len(queue) > unfinished:
+            unclaimed.append(queue.pop())
+        _fill_warm(sync_request_timeout)
+    for future in unclaimed:
+        future.add_done_callback(_stop_started)
+
+
+def _forget(spec: ImageSpec | BuildSpec, future: Future[Any]) -> None:
+    with _SESSION_LOCK:
+        if _SESSION_FUTURES.get(spec) is future:
+            del _SESSION_FUTURES[spec]
+
+
+def _session_connection(spec: ImageSpec | BuildSpec, sync_request_timeout: int) -> Any:  # noqa: ANN401
+    """Return the live session connection for *spec*, replacing dead ones.
+
+    A failed start is reported to the test that waits on it and forgotten,
+    so the next test for *spec* tries again.
+    """
+    while True:
+        future = _session_future(spec, sync_request_timeout)
+        try:
+            stack, conn = future.result()
+        except BaseException:
+            _forget(spec, future)
+            raise
+        if not conn.closed:
+            conn._config["sync_request_timeout"] = sync_request_timeout  # noqa: SLF001
+            return conn
+        _forget(spec, future)
+        stack.close()
+
+
+def prewarm(
+    specs: Mapping[str, ImageSpec | BuildSpec], *, sync_request_timeout: int = 30
+) -> None:
+    """Start containers for the tests' *specs*, in order, in the background.
+
+    *specs* maps each test's id to its spec. With the ``session`` scope one
+    container is started per distinct spec. With the ``function`` scope and
+    a parallelism set by :func:`set_parallelism`, up to that many fresh
+    containers are kept starting ahead of the tests, one per test, until
+    each test claims its container or is passed to :func:`release_warm`.
+    Either way tests find their container already bootstrapped, or at least
+    further along, instead of starting each one in turn.
+    """
+    if session_scoped():
+        for spec in specs.values():
+            _ = _session_future(spec, sync_request_timeout)
+        return
+    if _parallelism == 0:
+        return
+    with _SESSION_LOCK:
+        _UPCOMING.update(specs)
+        _fill_warm(sync_request_timeout)
+
+
+@contextmanager
+def spec_connection(
+    spec: ImageSpec | BuildSpec, *, sync_request_timeout: int = 30
+) -> Iterator[Any]:
+    """Yield a connection to a container for *spec*.
+
+    With the ``function`` scope every call gets a fresh container, started
+    ahead by :func:`prewarm` when possible, and stopped afterwards. With the
+    ``session`` scope the first call's container is kept and handed to every
+    later call with an equal *spec* until :func:`close_session_connections`.
+    """
+    if not session_scoped():
+        future = _claim_warm(spec, sync_request_timeout)
+        if future is None:
+            with _open_connection(spec, sync_request_timeout) as conn:
+                yield conn
+            return
+        stack, conn = future.result()
+        with stack:
+            conn._config["sync_request_timeout"] = sync_request_timeout  # noqa: SLF001
+            yield conn
+        return
+
+    yield _session_connection(spec, sync_request_timeout)
+
+
+def close_session_connections() -> None:
+    """Close every session-scoped connection and stop its container.
+
+    Containers still starting are waited for, then stopped as well, and so
+    are containers started ahead for tests that never claimed them.
+    """
+    global _executor
+    with _SESSION_LOCK:
+        futures = list(_SESSION_FUTURES.values())
+        for queue in _WARM_FUTURES.values():
+            futures.extend(queue)
+        _SESSION_FUTURES.clear()
+        _WARM_FUTURES.clear()
+        _UPCOMING.clear()
+        _STARTED_AHEAD.clear()
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
+    for future in futures:
+        _stop_started(future)
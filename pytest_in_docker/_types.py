@@ -21,14 +21,18 @@ class ContainerPrepareError(RuntimeError):
     """Raised when container preparation fails."""
 
 
-@dataclass(frozen=True)
+class ResultUnpicklingError(RuntimeError):
+    """Raised when a value returned from a container can't be loaded on the host."""
+
+
+@dataclass(frozen=True, slots=True)
 class ImageSpec:
     """A container specification referencing a pre-built image."""
 
     image: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class BuildSpec:
     """A container specification that builds an image from a path."""
 
@@ -39,7 +43,7 @@ class BuildSpec:
 ContainerFactory = Callable[[int], AbstractContextManager["DockerContainer"]]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class FactorySpec:
     """A container specification using a user-provided factory."""
 
@@ -0,0 +1,17 @@
+"""Shared fixtures for the test suite."""
+
+from __future__ import annotations
+
+import pytest
+
+
+class HostSettings:
+    """A fixture type only the host can import, as with any conftest class."""
+
+    def __init__(self, distro: str) -> None:
+        self.distro = distro
+
+
+@pytest.fixture
+def host_settings() -> HostSettings:
+    return HostSettings("alpine")
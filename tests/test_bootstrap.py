@@ -0,0 +1,94 @@
+"""End-to-end tests for the branches of the container bootstrap script."""
+
+from __future__ import annotations
+
+import pathlib
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+
+from testcontainers.core.container import DockerContainer
+
+from pytest_in_docker import in_container
+from pytest_in_docker._container import INSTALLED_MARKER, VENV_DIR, VERBOSE_ENV_VAR
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    import pytest
+
+
+@contextmanager
+def prepared_factory(port: int, *setup: str) -> Iterator[DockerContainer]:
+    """Start python:alpine and run the *setup* shell commands in it."""
+    with (
+        DockerContainer("python:alpine")
+        .with_command("sleep infinity")
+        .with_exposed_ports(port) as container
+    ):
+        container.start()
+        for command in setup:
+            res = container.exec(["sh", "-c", command])
+            assert res.exit_code == 0, res.output
+        yield container
+
+
+@contextmanager
+def pytest_preinstalled_factory(port: int) -> Iterator[DockerContainer]:
+    with prepared_factory(port, "python -m pip install -q pytest") as container:
+        yield container
+
+
+@contextmanager
+def broken_venv_factory(port: int) -> Iterator[DockerContainer]:
+    """Leave a venv behind without the deps, as a failed install would."""
+    with prepared_factory(port, f"python -m venv {VENV_DIR}") as container:
+        yield container
+
+
+@in_container(factory=pytest_preinstalled_factory)
+def probe_venv_exists() -> bool:
+    return pathlib.Path(VENV_DIR).exists()
+
+
+@in_container(factory=broken_venv_factory)
+def probe_installed_venv() -> tuple[str, bool]:
+    import sys
+
+    import pytest
+
+    assert pytest.__file__.startswith(VENV_DIR)
+    return sys.executable, pathlib.Path(INSTALLED_MARKER).exists()
+
+
+def test_preinstalled_pytest_skips_install(
+    monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    """An image whose python imports pytest is used as is, without a venv."""
+    monkeypatch.setenv(VERBOSE_ENV_VAR, "1")
+    assert not probe_venv_exists()
+    assert "installed container deps with none" in capsys.readouterr().err
+
+
+def test_unfinished_venv_is_reinstalled(
+    monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    """A venv without the install marker is rebuilt rather than trusted."""
+    monkeypatch.setenv(VERBOSE_ENV_VAR, "1")
+    assert probe_installed_venv() == (f"{VENV_DIR}/bin/python", True)
+    assert "installed container deps with pip" in capsys.readouterr().err
+
+
+@in_container("ghcr.io/astral-sh/uv:python3.14-alpine")
+def probe_interpreter() -> str:
+    import sys
+
+    return sys.executable
+
+
+def test_uv_installs_when_available(
+    monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    """Images that ship uv get the venv and the deps installed with it."""
+    monkeypatch.setenv(VERBOSE_ENV_VAR, "1")
+    assert probe_interpreter() == f"{VENV_DIR}/bin/python"
+    assert "installed container deps with uv" in capsys.readouterr().err
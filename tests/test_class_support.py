@@ -2,7 +2,9 @@
 
 from enum import Enum
 
-from pytest_in_docker import in_container
+import pytest
+
+from pytest_in_docker import ResultUnpicklingError, in_container
 
 
 class Greeter:
@@ -86,3 +88,30 @@ def test_module_level_enum() -> None:
     """Enum classes serialize correctly."""
     assert Color.RED.value == 1
     assert Color.GREEN.name == "GREEN"
+
+
+@in_container("python:alpine")
+def make_greeters() -> list[Greeter]:
+    return [Greeter("alpine"), Greeter("docker")]
+
+
+def test_module_level_class_returned() -> None:
+    """Results come back as copies that outlive the container."""
+    greeters = make_greeters()
+    assert type(greeters) is list
+    assert [g.greet() for g in greeters] == ["hello alpine", "hello docker"]
+
+
+@in_container("python:alpine")
+def make_container_only_value() -> object:
+    import importlib
+    import pathlib
+
+    _ = pathlib.Path("/tmp/container_only_mod.py").write_text("class Value: ...\n")
+    return importlib.import_module("container_only_mod").Value()
+
+
+def test_container_only_type_is_reported() -> None:
+    """A result whose type the host can't import fails with a clear error."""
+    with pytest.raises(ResultUnpicklingError, match="container_only_mod"):
+        make_container_only_value()
@@ -5,9 +5,24 @@ reference module-level imports, constants, and helpers without needing to
 re-import everything inside the function body.
 """
 
+import hashlib
+import os
+import pickle
 import platform
+import time
 
-from pytest_in_docker import in_container
+import pytest
+
+from pytest_in_docker import ImageSpec, in_container
+from pytest_in_docker._container import (
+    _PAYLOAD_CHUNK,
+    _REMOTE_FUNCS_ATTR,
+    _call,
+    _load_remotes,
+    _pickle_payload,
+    _remote_functions,
+)
+from pytest_in_docker._session import spec_connection
 
 EXPECTED_ID = "alpine"
 
@@ -46,3 +61,46 @@ def is_alpine() -> bool:
 def test_transitive_module_level_helpers() -> None:
     """Helpers that call other helpers serialize transitively."""
     assert is_alpine()
+
+
+def test_payload_is_pickled_once_per_function() -> None:
+    """Parametrized reruns of a test reuse the first serialized payload."""
+    first = _pickle_payload(is_alpine)
+    assert _pickle_payload(is_alpine) is first
+
+
+def test_remote_functions_load_in_one_batch() -> None:
+    """A function and its shim register together; a bad payload fails fast."""
+    timeout = 30
+    with spec_connection(
+        ImageSpec("python:alpine"), sync_request_timeout=timeout
+    ) as conn:
+        remote_func, call = _remote_functions(conn, is_alpine, _call)
+        assert set(conn.__dict__[_REMOTE_FUNCS_ATTR]) == {is_alpine, _call}
+        assert tuple(call(remote_func)) == (False, True)
+        start = time.monotonic()
+        with pytest.raises(pickle.UnpicklingError):
+            _ = _load_remotes(conn, [_pickle_payload(get_os_id), b"not a pickle"])
+        assert time.monotonic() - start < timeout / 3
+
+
+# Pickled by value with the function that reads it, so the function's
+# payload alone is several chunks long.
+LARGE_CONSTANT = bytes(range(256)) * (5 * _PAYLOAD_CHUNK // 256)
+
+
+@in_container("python:alpine")
+def digest_large_values(values: dict[str, bytes]) -> tuple[str, str]:
+    return (
+        hashlib.sha256(LARGE_CONSTANT).hexdigest(),
+        hashlib.sha256(values["blob"]).hexdigest(),
+    )
+
+
+def test_payloads_over_a_chunk_round_trip() -> None:
+    """Functions and arguments larger than a request are sent in chunks."""
+    blob = os.urandom(3 * _PAYLOAD_CHUNK + 1)
+    assert digest_large_values({"blob": blob}) == (
+        hashlib.sha256(LARGE_CONSTANT).hexdigest(),
+        hashlib.sha256(blob).hexdigest(),
+    )
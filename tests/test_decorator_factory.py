@@ -2,12 +2,15 @@
 
 from __future__ import annotations
 
+import pathlib
 from contextlib import contextmanager
 from typing import TYPE_CHECKING
 
+import pytest
 from testcontainers.core.container import DockerContainer
 
 from pytest_in_docker import in_container
+from pytest_in_docker._container import _CONN_POOL, _discard_if_stopped
 
 if TYPE_CHECKING:
     from collections.abc import Iterator
@@ -53,3 +56,68 @@ def test_factory_with_env_var() -> None:
     import os
 
     assert os.environ.get("MY_TEST_VAR") == "hello_from_factory"
+
+
+_long_lived: list[DockerContainer] = []
+
+
+@contextmanager
+def long_lived_factory(port: int) -> Iterator[DockerContainer]:
+    """Yield the same running container to every test."""
+    if not _long_lived:
+        container = (
+            DockerContainer("python:alpine")
+            .with_command("sleep infinity")
+            .with_exposed_ports(port)
+        )
+        container.start()
+        _long_lived.append(container)
+    yield _long_lived[0]
+
+
+@in_container(factory=long_lived_factory)
+def touch_pool_marker() -> bool:
+    marker = pathlib.Path("/tmp/pool-marker")
+    existed = marker.exists()
+    marker.touch()
+    return existed
+
+
+def test_long_lived_factory_reuses_pooled_connection() -> None:
+    """Later tests reuse the bootstrapped connection until the container stops."""
+    try:
+        assert not touch_pool_marker()
+        key = str(_long_lived[0].get_wrapped_container().id)
+        conn = _CONN_POOL[key]
+        assert touch_pool_marker()
+        assert _CONN_POOL[key] is conn
+    finally:
+        container = _long_lived.pop()
+        container.stop()
+    _discard_if_stopped(container)
+    assert key not in _CONN_POOL
+    assert conn.closed
+
+
+_started: list[str] = []
+
+
+@contextmanager
+def recording_factory(port: int) -> Iterator[DockerContainer]:
+    """Start a python:alpine container and record its id."""
+    with alpine_factory(port) as container:
+        _started.append(str(container.get_wrapped_container().id))
+        yield container
+
+
+@in_container(factory=recording_factory)
+def fail_in_container() -> None:
+    msg = "boom"
+    raise RuntimeError(msg)
+
+
+def test_failing_test_discards_pooled_connection() -> None:
+    """A stopped container's connection is dropped even when its test fails."""
+    with pytest.raises(RuntimeError, match="boom"):
+        fail_in_container()
+    assert _started[-1] not in _CONN_POOL
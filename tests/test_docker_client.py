@@ -0,0 +1,46 @@
+"""Tests for the Docker client shared by containers and images."""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from testcontainers.core.config import testcontainers_config
+from testcontainers.core.container import Reaper
+
+from pytest_in_docker import _container
+from pytest_in_docker._container import docker_container, shared_docker_client
+
+
+def test_container_stop_keeps_shared_client_open() -> None:
+    """Stopping a container leaves the shared client's connection pool alive."""
+    api = shared_docker_client().client.api
+    adapter = getattr(api, "_custom_adapter", None)
+    if adapter is None:
+        pytest.skip("Docker is not reached over a unix socket")
+    _ = api.ping()
+    pools = list(adapter.pools.values())
+    with docker_container("python:alpine").with_command("sleep infinity"):
+        pass
+    assert list(adapter.pools.values()) == pools
+    assert api.ping()
+
+
+def test_reaper_is_created_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Concurrent first container starts don't race to create the Reaper."""
+    created: list[str] = []
+
+    def create() -> str:
+        created.append(threading.current_thread().name)
+        time.sleep(0.05)
+        return "reaper"
+
+    monkeypatch.setattr(testcontainers_config, "ryuk_disabled", False)
+    monkeypatch.setattr(Reaper, "_instance", None)
+    monkeypatch.setattr(Reaper, "_create_instance", create)
+    with ThreadPoolExecutor(4) as pool:
+        for _ in range(4):
+            pool.submit(_container._ensure_reaper)  # noqa: SLF001
+    assert len(created) == 1
@@ -1,5 +1,7 @@
 """Tests for pytest-in-docker plugin."""
 
+import pytest
+
 from pytest_in_docker import in_container
 
 
@@ -10,3 +12,13 @@ def test_etc_release() -> None:
 
     rel_info = platform.freedesktop_os_release()
     assert rel_info["ID"].lower() == "alpine"
+
+
+@pytest.mark.parametrize("expected_id", ["alpine", "ALPINE"])
+@in_container("python:alpine")
+def test_parametrized_decorator(expected_id: str) -> None:
+    """Parameters reach a decorated test through its wrapped signature."""
+    import platform
+
+    rel_info = platform.freedesktop_os_release()
+    assert rel_info["ID"] == expected_id.lower()
@@ -0,0 +1,138 @@
+"""Tests for the opt-in prepared-image cache."""
+
+from __future__ import annotations
+
+import pathlib
+import sys
+from typing import TYPE_CHECKING
+
+import pytest
+
+from pytest_in_docker import _image_cache, evict_cached_images, in_container
+from pytest_in_docker._container import (
+    VENV_DIR,
+    docker_container,
+    shared_docker_client,
+)
+from pytest_in_docker._image_cache import (
+    CACHE_ENV_VAR,
+    HOST_NET_ENV_VAR,
+    UNIX_SOCKET_ENV_VAR,
+    built_image_container,
+    cache_tag_for,
+    cached_image_for,
+)
+
+if TYPE_CHECKING:
+    from testcontainers.core.container import DockerContainer
+
+
+@in_container("python:alpine")
+def probe_server_script() -> bool:
+    return pathlib.Path("/tmp/rpyc_server.py").exists()
+
+
+@in_container("python:alpine")
+def probe_rpyc_socket() -> bool:
+    return pathlib.Path("/run/pytest-in-docker/rpyc.sock").is_socket()
+
+
+def test_prepared_image_is_reused(monkeypatch: pytest.MonkeyPatch) -> None:
+    """The first run commits a prepared image; the second starts from it."""
+    monkeypatch.setenv(CACHE_ENV_VAR, "1")
+    tag = cache_tag_for("python:alpine")
+    try:
+        assert probe_server_script()
+        assert cached_image_for("python:alpine") == tag
+        assert probe_server_script()
+    finally:
+        removed = evict_cached_images(tags=[tag])
+    assert removed == [tag]
+    assert cached_image_for("python:alpine") is None
+
+
+def test_cache_disabled_by_default(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv(CACHE_ENV_VAR, raising=False)
+    assert cached_image_for("python:alpine") is None
+
+
+def test_prebaked_image_is_used(monkeypatch: pytest.MonkeyPatch) -> None:
+    """With prebaking, containers start from a derived image with the server."""
+    monkeypatch.setattr(_image_cache, "_prebake", True)
+    tag = _image_cache.prebaked_tag_for("python:alpine")
+    try:
+        assert probe_server_script()
+        assert probe_server_script()
+    finally:
+        removed = evict_cached_images(tags=[tag])
+    assert removed == [tag]
+
+
+def test_baked_image_is_kept(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: pathlib.Path
+) -> None:
+    """Rebuilding an unchanged Dockerfile reuses the image with the deps baked in."""
+    _ = (tmp_path / "Dockerfile").write_text("FROM python:alpine\n")
+    tag = "pytest-in-docker-test:baked"
+    baked: list[str] = []
+    baked_image = _image_cache.baked_image
+
+    def recording_baked_image(base: str, image_id: str) -> str:
+        baked.append(baked_image(base, image_id))
+        return baked[-1]
+
+    monkeypatch.setattr(_image_cache, "baked_image", recording_baked_image)
+    client = shared_docker_client().client
+    ids: list[str | None] = []
+    try:
+        for _ in range(2):
+            with built_image_container(str(tmp_path), tag) as conn:
+                assert conn.modules.sys.prefix == VENV_DIR
+            ids.append(client.images.get(baked[-1]).id)
+            assert not client.images.list(name=tag)
+    finally:
+        removed = evict_cached_images(tags=set(baked))
+    assert baked[0] == baked[1]
+    assert ids[0] == ids[1]
+    assert removed == [baked[0]]
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="Unix sockets need Linux")
+def test_unix_socket_transport(monkeypatch: pytest.MonkeyPatch) -> None:
+    """The rpyc server listens on the bind-mounted socket instead of a port."""
+    monkeypatch.setenv(UNIX_SOCKET_ENV_VAR, "1")
+    assert probe_rpyc_socket()
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="Unix sockets need Linux")
+def test_unix_socket_as_non_root_user(monkeypatch: pytest.MonkeyPatch) -> None:
+    """A server running as another user than the host's can bind the socket."""
+    monkeypatch.setenv(UNIX_SOCKET_ENV_VAR, "1")
+    monkeypatch.setattr(_image_cache, "_prebake", True)
+    monkeypatch.setattr(
+        _image_cache,
+        "docker_container",
+        lambda image: docker_container(image).with_kwargs(user="nobody"),
+    )
+    tag = _image_cache.prebaked_tag_for("python:alpine")
+    try:
+        assert probe_rpyc_socket()
+    finally:
+        _ = evict_cached_images(tags=[tag])
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="host networking needs Linux")
+def test_host_network(monkeypatch: pytest.MonkeyPatch) -> None:
+    """The container shares the host's network and is reached on loopback."""
+    monkeypatch.setenv(HOST_NET_ENV_VAR, "1")
+    monkeypatch.delenv(UNIX_SOCKET_ENV_VAR, raising=False)
+    started: list[DockerContainer] = []
+
+    def recording_container(image: str) -> DockerContainer:
+        started.append(docker_container(image))
+        return started[-1]
+
+    monkeypatch.setattr(_image_cache, "docker_container", recording_container)
+    assert probe_server_script()
+    attrs = started[0].get_wrapped_container().attrs
+    assert attrs["HostConfig"]["NetworkMode"] == "host"
@@ -11,6 +11,8 @@ from testcontainers.core.container import DockerContainer
 if TYPE_CHECKING:
     from collections.abc import Iterator
 
+    from tests.conftest import HostSettings
+
 
 @pytest.mark.in_container("python:alpine")
 def test_mark_basic() -> None:
@@ -76,3 +78,32 @@ def test_mark_debian_bookworm() -> None:
     rel_info = platform.freedesktop_os_release()
     assert rel_info["ID"].lower() == "debian"
     assert "bookworm" in rel_info["VERSION_CODENAME"].lower()
+
+
+@pytest.fixture
+def settings() -> dict[str, str]:
+    """Fixture whose value isn't a plain builtin rpyc would send by value."""
+    return {"distro": "alpine"}
+
+
+@pytest.mark.in_container("python:alpine")
+def test_fixture_value_is_copied(settings: dict[str, str]) -> None:
+    """Fixture values arrive as real objects, not proxies to the host."""
+    import platform
+
+    assert type(settings) is dict
+    rel_info = platform.freedesktop_os_release()
+    assert rel_info["ID"].lower() == settings["distro"]
+
+
+@pytest.mark.in_container("python:alpine")
+def test_host_only_fixture_type_is_passed(
+    host_settings: HostSettings, settings: dict[str, str]
+) -> None:
+    """A fixture the container can't unpickle arrives as a proxy instead.
+
+    The conftest module isn't importable in the container, so unpickling
+    *host_settings* there fails; *settings* is still copied.
+    """
+    assert type(settings) is dict
+    assert host_settings.distro == settings["distro"]
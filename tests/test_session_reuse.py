@@ -0,0 +1,137 @@
+"""Tests for session-scoped container reuse."""
+
+from __future__ import annotations
+
+import pathlib
+from concurrent.futures import Future
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any
+
+from pytest_in_docker import ImageSpec, _plugin, _session, in_container
+from pytest_in_docker._session import (
+    REUSE_SESSION,
+    close_session_connections,
+    prewarm,
+)
+
+if TYPE_CHECKING:
+    import pytest
+
+
+@in_container("python:alpine")
+def touch_marker() -> bool:
+    marker = pathlib.Path("/tmp/reuse-marker")
+    existed = marker.exists()
+    marker.touch()
+    return existed
+
+
+def test_session_scope_shares_container(monkeypatch: pytest.MonkeyPatch) -> None:
+    """The second call runs in the container the first one left behind."""
+    monkeypatch.setattr(_session, "_reuse_scope", REUSE_SESSION)
+    try:
+        assert not touch_marker()
+        assert touch_marker()
+    finally:
+        close_session_connections()
+
+
+def test_function_scope_starts_fresh_containers() -> None:
+    assert not touch_marker()
+    assert not touch_marker()
+
+
+def _warm_count() -> int:
+    return sum(len(queue) for queue in _session._WARM_FUTURES.values())  # noqa: SLF001
+
+
+def test_prestarted_containers_are_fresh(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Containers started ahead of the calls are each used by one call."""
+    monkeypatch.setattr(_session, "_parallelism", 2)
+    spec = ImageSpec("python:alpine")
+    try:
+        prewarm({"first": spec, "second": spec})
+        assert _warm_count() == 2
+        assert not touch_marker()
+        assert _warm_count() == 1
+        assert not touch_marker()
+        assert _warm_count() == 0
+    finally:
+        close_session_connections()
+
+
+def test_unclaimed_slots_are_released(monkeypatch: pytest.MonkeyPatch) -> None:
+    """A test that never claims its container hands its slot to the next one."""
+    started: list[Future[Any]] = []
+    stopped: list[object] = []
+
+    def fake_start(_spec: object, _timeout: int) -> Future[Any]:
+        future: Future[Any] = Future()
+        stack = SimpleNamespace(close=lambda: stopped.append(future))
+        future.set_result((stack, SimpleNamespace(close=lambda: None)))
+        started.append(future)
+        return future
+
+    monkeypatch.setattr(_session, "_parallelism", 2)
+    monkeypatch.setattr(_session, "_submit_start", fake_start)
+    spec = ImageSpec("python:alpine")
+    try:
+        prewarm(dict.fromkeys("abcde", spec))
+        assert len(started) == 2
+        # a and b are skipped: their containers go to c and d.
+        _session.release_warm("a")
+        _session.release_warm("b")
+        assert len(started) == 4
+        assert len(stopped) == 2
+        assert _warm_count() == 2
+        # c claims its container, so e starts.
+        assert _session._claim_warm(spec, 30) is not None  # noqa: SLF001
+        _session.release_warm("c")
+        assert len(started) == 5
+        assert _warm_count() == 2
+        # d and e are never run.
+        _session.release_warm("d")
+        _session.release_warm("e")
+        assert _warm_count() == 0
+        assert len(stopped) == 4
+    finally:
+        close_session_connections()
+
+
+def _fake_item(config: object, obj: object) -> Any:  # noqa: ANN401
+    return SimpleNamespace(
+        config=config,
+        obj=obj,
+        nodeid=f"test_session_reuse.py::{obj.__name__}",  # pyright: ignore[reportAttributeAccessIssue]
+        get_closest_marker=lambda _: None,
+    )
+
+
+def test_xdist_worker_does_not_prewarm_collection(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """A worker only runs some of the tests it collects, so it prewarms none."""
+    prewarmed: dict[str, ImageSpec] = {}
+    monkeypatch.setattr(_plugin, "prewarm", prewarmed.update)
+    worker = SimpleNamespace(workerinput={"workerid": "gw0"})
+    items = [_fake_item(worker, touch_marker)]
+    _plugin.pytest_collection_modifyitems(worker, items)  # pyright: ignore[reportArgumentType]
+    assert prewarmed == {}
+    _plugin.pytest_collection_modifyitems(SimpleNamespace(), items)  # pyright: ignore[reportArgumentType]
+    assert list(prewarmed.values()) == [ImageSpec("python:alpine")]
+
+
+def test_xdist_worker_prewarms_next_scheduled_test(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """A worker starts the container of the test it will run next."""
+    prewarmed: dict[str, ImageSpec] = {}
+    monkeypatch.setattr(_plugin, "prewarm", prewarmed.update)
+    worker = SimpleNamespace(workerinput={"workerid": "gw0"})
+    item = _fake_item(worker, touch_marker)
+    _plugin.pytest_runtest_protocol(item, None)
+    assert prewarmed == {}
+    _plugin.pytest_runtest_protocol(item, _fake_item(worker, touch_marker))
+    assert list(prewarmed.values()) == [ImageSpec("python:alpine")]
+    _plugin.pytest_runtest_protocol(_fake_item(SimpleNamespace(), touch_marker), item)
+    assert list(prewarmed.values()) == [ImageSpec("python:alpine")]
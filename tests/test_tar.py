@@ -0,0 +1,39 @@
+"""Tests for the hand-rolled tar writer used for container uploads."""
+
+import io
+import tarfile
+
+import pytest
+
+from pytest_in_docker._container import _tar_archive
+
+
+def _tarfile_archive(members: dict[str, bytes]) -> bytes:
+    stream = io.BytesIO()
+    with tarfile.open(fileobj=stream, mode="w") as tar:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name=name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return stream.getvalue()
+
+
+@pytest.mark.parametrize(
+    "members",
+    [
+        {"transfer.txt": b""},
+        {"transfer.txt": b"print('hello')\n"},
+        {"transfer.txt": b"x" * 512},
+        {"transfer.txt": b"x" * (17 * 512)},  # ends exactly on a record
+        {"transfer.txt": "café ☃".encode() * 40_000},
+        {"pkg/__init__.py": b"from pkg.mod import f\n", "pkg/mod.py": b"f = 1\n"},
+        {"n" * 100: b"fills the name field"},
+    ],
+)
+def test_matches_tarfile(members: dict[str, bytes]) -> None:
+    assert _tar_archive(members) == _tarfile_archive(members)
+
+
+def test_long_name_is_rejected() -> None:
+    with pytest.raises(ValueError, match="longer than 100 bytes"):
+        _ = _tar_archive({"n" * 101: b""})